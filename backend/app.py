@@ -1,9 +1,15 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, Response
+from starlette.routing import Match
+from backend.config import Config
 from backend.routes import auth, chat, data_upload
+from backend.services import telemetry
+from backend.services.registry import registry
 import os
+import random
+import time
 
 app = FastAPI(
     title="AI - Physio bot",
@@ -28,6 +34,47 @@ app.include_router(auth.router)
 app.include_router(chat.router)
 app.include_router(data_upload.router)
 
+def route_template(request: Request) -> str:
+    """Path template (e.g. /chat/start/{user_id}) so metric labels stay low-cardinality"""
+    for route in app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return getattr(route, "path", request.url.path)
+    return "unmatched"
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Trace ID, route label and log sampling for everything that runs during the request"""
+    trace_id = request.headers.get("X-Request-ID") or telemetry.new_trace_id()
+    route = route_template(request)
+    tokens = [
+        telemetry.trace_id_var.set(trace_id),
+        telemetry.route_var.set(route),
+        telemetry.sampled_var.set(Config.LOG_SAMPLE_RATE > 0 and random.random() < Config.LOG_SAMPLE_RATE)
+    ]
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        response.headers["X-Trace-ID"] = trace_id
+        return response
+    finally:
+        telemetry.observe_request(route, request.method, status, time.perf_counter() - start)
+        for var, token in zip((telemetry.trace_id_var, telemetry.route_var, telemetry.sampled_var), tokens):
+            var.reset(token)
+
+@app.on_event("startup")
+async def warm_up_services():
+    """Load the embedding model, vector store and LLM client"""
+    if Config.WARMUP_MODE == "skip":
+        registry.mark_ready()
+    elif Config.WARMUP_MODE == "blocking":
+        registry.warmup(retry_seconds=Config.WARMUP_RETRY_SECONDS, max_retry_seconds=Config.WARMUP_RETRY_MAX_SECONDS)
+    else:
+        registry.warmup(background=True, retry_seconds=Config.WARMUP_RETRY_SECONDS,
+                        max_retry_seconds=Config.WARMUP_RETRY_MAX_SECONDS)
+
 @app.get("/")
 async def root():
     """Serve the main frontend page"""
@@ -46,6 +93,18 @@ async def api_info():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 503 until the services have been warmed up"""
+    status = registry.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: per-stage and per-route latency histograms"""
+    body, content_type = telemetry.metrics_payload()
+    return Response(content=body, media_type=content_type)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8002)
\ No newline at end of file
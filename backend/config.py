@@ -11,6 +11,68 @@ class Config:
     
     # BioBERT Model
     BIOBERT_MODEL = "dmis-lab/biobert-v1.1"
+    EMBEDDING_MAX_LENGTH = 512
+    EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+    EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")  # torch or onnx (int8)
+    ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", ".cache/onnx/biobert-v1.1")
+    ONNX_NUM_THREADS = int(os.getenv("ONNX_NUM_THREADS", "0"))
+
+    # Vector post-processing (changing any of these requires a re-ingest)
+    EMBEDDING_NORMALIZE = os.getenv("EMBEDDING_NORMALIZE", "false").lower() == "true"
+    EMBEDDING_DTYPE = os.getenv("EMBEDDING_DTYPE", "float32")  # float32 or float16
+    EMBEDDING_PCA_PATH = os.getenv("EMBEDDING_PCA_PATH", "")
+
+    # Bulk ingestion (ingest_data.py only, never the upload routes): >1 shards embedding across worker processes
+    EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", "0"))
+    EMBEDDING_THREADS_PER_WORKER = int(os.getenv("EMBEDDING_THREADS_PER_WORKER", "0"))
+    # Query path: micro-batch concurrent query embeddings into one forward pass
+    EMBEDDING_SCHEDULER_ENABLED = os.getenv("EMBEDDING_SCHEDULER_ENABLED", "false").lower() == "true"
+    EMBEDDING_SCHEDULER_WINDOW_MS = float(os.getenv("EMBEDDING_SCHEDULER_WINDOW_MS", "5"))
+    EMBEDDING_SCHEDULER_MAX_BATCH = int(os.getenv("EMBEDDING_SCHEDULER_MAX_BATCH", "32"))
+
+    # Query Embedding Cache ("memory" per worker, or "redis" shared across workers)
+    QUERY_CACHE_ENABLED = os.getenv("QUERY_CACHE_ENABLED", "true").lower() == "true"
+    QUERY_CACHE_BACKEND = os.getenv("QUERY_CACHE_BACKEND", "memory")
+    QUERY_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "4096"))
+    QUERY_CACHE_TTL_SECONDS = float(os.getenv("QUERY_CACHE_TTL_SECONDS", "3600"))
+    REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+    # Answer cache for /chat/ask: repeated questions (same normalized text) reuse the answer.
+    # Matching similar questions by embedding is off until a threshold has been validated with
+    # benchmarks/answer_cache_calibration.py; raw BioBERT cosines run high even for unrelated questions
+    ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+    ANSWER_CACHE_SEMANTIC_ENABLED = os.getenv("ANSWER_CACHE_SEMANTIC_ENABLED", "false").lower() == "true"
+    ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.98"))
+    ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "2048"))
+    ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "86400"))
+    # Bumped by uploads and ingest_data.py; must be shared storage if workers run on several machines
+    KNOWLEDGE_BASE_VERSION_FILE = os.getenv("KNOWLEDGE_BASE_VERSION_FILE", ".cache/knowledge_base.version")
+
+    # LLM: "gemini", or "stub" for deterministic canned responses (load tests, local development)
+    LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+    STUB_LLM_LATENCY_MS = float(os.getenv("STUB_LLM_LATENCY_MS", "400"))  # simulated time to first token
+    STUB_LLM_TOKENS_PER_SECOND = float(os.getenv("STUB_LLM_TOKENS_PER_SECOND", "150"))  # 0 = no per-token delay
+    STUB_LLM_INTAKE_TURNS = int(os.getenv("STUB_LLM_INTAKE_TURNS", "12"))  # answers before INFORMATION_COMPLETE
+
+    # Intake: "slots" tracks the twelve intake fields with one structured LLM call per turn and
+    # decides completion locally; "transcript" lets the model re-read the chat and say INFORMATION_COMPLETE
+    INTAKE_MODE = os.getenv("INTAKE_MODE", "slots")
+    INTAKE_MAX_USER_MESSAGES = int(os.getenv("INTAKE_MAX_USER_MESSAGES", "25"))  # summarise anyway after this many
+
+    # Async routes run blocking work (embedding, vector search, ingestion) on this many threads
+    BLOCKING_EXECUTOR_WORKERS = int(os.getenv("BLOCKING_EXECUTOR_WORKERS", "4"))
+
+    # Conversation compaction for the intake prompts: the last HISTORY_RECENT_MESSAGES stay verbatim;
+    # older ones are dropped (slots intake, facts live in intake_state) or folded into a running
+    # summary that is extended every HISTORY_SUMMARY_BATCH messages (transcript intake)
+    HISTORY_COMPACTION_ENABLED = os.getenv("HISTORY_COMPACTION_ENABLED", "false").lower() == "true"
+    HISTORY_RECENT_MESSAGES = int(os.getenv("HISTORY_RECENT_MESSAGES", "6"))
+    HISTORY_SUMMARY_BATCH = int(os.getenv("HISTORY_SUMMARY_BATCH", "6"))
+
+    # Embedding Cache
+    EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+    EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", ".cache/embeddings")
+    EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "20000"))
     
     # Database
     MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
@@ -21,6 +83,51 @@ class Config:
     ALGORITHM = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES = 30
     
+    # Vector Store: "weaviate", or "local" for the in-process memory-mapped index
+    VECTOR_STORE = os.getenv("VECTOR_STORE", "weaviate")
+    LOCAL_STORE_DIR = os.getenv("LOCAL_STORE_DIR", ".cache/vector_store")
+    LOCAL_STORE_INDEX = os.getenv("LOCAL_STORE_INDEX", "exact")  # exact or hnsw
+    LOCAL_STORE_HNSW_EF = int(os.getenv("LOCAL_STORE_HNSW_EF", "64"))
+
+    # Chunking: documents longer than one forward pass are split with overlap
+    CHUNKING_ENABLED = os.getenv("CHUNKING_ENABLED", "true").lower() == "true"
+    CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "510"))  # 512 minus [CLS]/[SEP]
+    CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "64"))
+    CHUNK_SEARCH_OVERFETCH = 3
+
+    # Retrieval: "vector", or "hybrid" to fuse BM25 and vector hits with reciprocal rank fusion
+    RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "vector")
+    RAG_SEARCH_LIMIT = int(os.getenv("RAG_SEARCH_LIMIT", "10"))
+    # Fixed number of hits per document type for every query, e.g. "assessment:4,exercise:6" (empty = no quotas)
+    RAG_TYPE_QUOTAS = {
+        doc_type.strip(): int(quota)
+        for doc_type, quota in (item.split(":") for item in os.getenv("RAG_TYPE_QUOTAS", "").split(",") if item.strip())
+    }
+    RAG_STATE_MAX_CONVERSATIONS = int(os.getenv("RAG_STATE_MAX_CONVERSATIONS", "1000"))  # per-chat retrieval state kept in memory
+    # Assemble the summary context in the background once complaint and location are known
+    RAG_PREFETCH_ENABLED = os.getenv("RAG_PREFETCH_ENABLED", "true").lower() == "true"
+    LEXICAL_INDEX_ENABLED = os.getenv("LEXICAL_INDEX_ENABLED", "true").lower() == "true"  # built at ingest time
+    LEXICAL_INDEX_PATH = os.getenv("LEXICAL_INDEX_PATH", ".cache/lexical/bm25.json.gz")
+    RRF_K = int(os.getenv("RRF_K", "60"))
+
+    # Context assembly: MMR re-ranking of the merged hits, packed under a token budget
+    RERANK_ENABLED = os.getenv("RERANK_ENABLED", "true").lower() == "true"
+    RERANK_MMR_LAMBDA = float(os.getenv("RERANK_MMR_LAMBDA", "0.7"))  # 1.0 = relevance only
+    CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
+
+    # Observability: Prometheus metrics at /metrics, and the fraction of requests
+    # whose debug logs (searches, embedding batches, re-ranking) are written; 0 = off
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.1"))
+
+    # Startup: "background" warms services after the server starts accepting
+    # requests, "blocking" warms them before, "skip" leaves everything lazy
+    WARMUP_MODE = os.getenv("WARMUP_MODE", "background")
+    # A failed warmup (e.g. Weaviate still starting) is retried after this many
+    # seconds, doubling up to the maximum, until /ready can report ready; 0 = no retry
+    WARMUP_RETRY_SECONDS = float(os.getenv("WARMUP_RETRY_SECONDS", "2"))
+    WARMUP_RETRY_MAX_SECONDS = float(os.getenv("WARMUP_RETRY_MAX_SECONDS", "60"))
+
     # Data Paths
     ASSESSMENTS_PATH = "data/assessments"
     EXERCISES_PATH = "data/exercises"
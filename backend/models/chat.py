@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 class ChatMessage(BaseModel):
     role: str  # 'user' or 'assistant'
@@ -12,6 +12,8 @@ class ChatHistory(BaseModel):
     messages: List[ChatMessage] = []
     is_completed: bool = False
     summary: Optional[str] = None
+    intake_state: Dict[str, Optional[str]] = {}
+    history_summary: Optional[Dict] = None  # {"text", "messages"}: running summary of the older messages
     created_at: datetime = datetime.now()
     updated_at: datetime = datetime.now()
 
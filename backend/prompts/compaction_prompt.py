@@ -0,0 +1,14 @@
+COMPACTION_PROMPT = """You keep a running summary of a conversation between Hassy, an AI Physiotherapy Assistant, and a patient during intake.
+
+# RUNNING SUMMARY:
+{summary}
+
+# NEW MESSAGES:
+{messages}
+
+# YOUR TASK:
+Rewrite the running summary so it also covers the new messages. Keep every fact the patient gave (language, name, age, weight, complaint, location, onset, duration, intensity, activities, previous treatments, redness) and note which questions were asked but not answered yet. Use short bullet points, no more than 15, and nothing else.
+"""
+
+def get_compaction_prompt(summary: str, messages: str) -> str:
+    return COMPACTION_PROMPT.format(summary=summary or "(empty)", messages=messages)
@@ -1,14 +1,15 @@
 from fastapi import APIRouter, HTTPException
 from backend.models.user import UserCreate, UserResponse
-from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient
 from backend.config import Config
+from backend.services.telemetry import stage
 import uuid
 from datetime import datetime
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 # MongoDB connection
-client = MongoClient(Config.MONGODB_URI)
+client = AsyncIOMotorClient(Config.MONGODB_URI)
 db = client[Config.DATABASE_NAME]
 users_collection = db["users"]
 
@@ -17,7 +18,8 @@ async def register_user(user: UserCreate):
     """Register a new user with email"""
     
     # Check if user already exists
-    existing_user = users_collection.find_one({"email": user.email})
+    with stage("mongo_read"):
+        existing_user = await users_collection.find_one({"email": user.email})
     if existing_user:
         return UserResponse(
             user_id=existing_user["user_id"],
@@ -33,7 +35,8 @@ async def register_user(user: UserCreate):
         "created_at": datetime.now()
     }
     
-    users_collection.insert_one(user_data)
+    with stage("mongo_write"):
+        await users_collection.insert_one(user_data)
     
     return UserResponse(
         user_id=user_id,
@@ -44,7 +47,8 @@ async def register_user(user: UserCreate):
 @router.get("/user/{user_id}", response_model=UserResponse)
 async def get_user(user_id: str):
     """Get user by ID"""
-    user = users_collection.find_one({"user_id": user_id})
+    with stage("mongo_read"):
+        user = await users_collection.find_one({"user_id": user_id})
     
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -1,30 +1,57 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, BackgroundTasks, HTTPException
+from fastapi.responses import StreamingResponse
 from backend.models.chat import ChatRequest, ChatResponse, ChatMessage, ChatHistory
 from backend.services.chat_service import chat_service
 from backend.services.rag_service import rag_service
-from backend.services.gemini_llm import gemini_llm
-from pymongo import MongoClient
+from backend.services.answer_cache import answer_cache
+from backend.services.llm import llm
+from backend.services.executor import blocking_executor
+from backend.services.intake import empty_state
+from motor.motor_asyncio import AsyncIOMotorClient
 from backend.config import Config
+from backend.services.telemetry import observe_first_token, stage
 from datetime import datetime
-from typing import List
+from typing import AsyncIterator, Dict, List
 from pydantic import BaseModel
+import json
+import time
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
 # MongoDB connection
-client = MongoClient(Config.MONGODB_URI)
+client = AsyncIOMotorClient(Config.MONGODB_URI)
 db = client[Config.DATABASE_NAME]
 chat_collection = db["chats"]
 
+# Headers that keep proxies from buffering event streams
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+def sse_event(event: str, data: Dict) -> str:
+    """One Server-Sent Events frame"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def stream_events(events: AsyncIterator[Dict], started: float) -> AsyncIterator[str]:
+    """Relay service events as SSE frames, recording time to the first token"""
+    first_token = True
+    try:
+        async for event in events:
+            if first_token and event["event"] == "token":
+                observe_first_token(time.perf_counter() - started)
+                first_token = False
+            yield sse_event(event["event"], {key: value for key, value in event.items() if key != "event"})
+    except Exception as e:
+        yield sse_event("error", {"detail": str(e)})
+
 @router.post("/start/{user_id}")
 async def start_chat(user_id: str):
     """Start a new chat session"""
     
     # Check if there's an existing incomplete chat
-    existing_chat = chat_collection.find_one({
-        "user_id": user_id,
-        "is_completed": False
-    })
+    with stage("mongo_read"):
+        existing_chat = await chat_collection.find_one({
+            "user_id": user_id,
+            "is_completed": False
+        })
     
     if existing_chat:
         return {
@@ -46,39 +73,21 @@ async def start_chat(user_id: str):
         ],
         "is_completed": False,
         "summary": None,
+        "intake_state": empty_state(),
         "created_at": datetime.now(),
         "updated_at": datetime.now()
     }
     
-    chat_collection.insert_one(chat_data)
+    with stage("mongo_write"):
+        await chat_collection.insert_one(chat_data)
     
     return {
         "message": "Chat started",
         "greeting": greeting
     }
 
-@router.post("/message", response_model=ChatResponse)
-async def send_message(request: ChatRequest):
-    """Send a message and get response"""
-    
-    # Get chat history
-    chat = chat_collection.find_one({
-        "user_id": request.user_id,
-        "is_completed": False
-    })
-    
-    if not chat:
-        raise HTTPException(status_code=404, detail="No active chat found. Please start a chat first.")
-    
-    # Convert stored messages to ChatMessage objects
-    messages = [ChatMessage.model_validate(msg) for msg in chat["messages"]]
-    
-    # Add user message
-    user_message = ChatMessage(role="user", content=request.message, timestamp=datetime.now())
-    messages.append(user_message)
-    
-    # Get response from chat service
-    result = chat_service.process_message(request.message, messages)
+async def save_reply(user_id: str, messages: List[ChatMessage], result: Dict):
+    """Append the assistant reply (and intake state) to the active chat, closing it if the reply is the summary"""
     
     # Add assistant response
     assistant_message = ChatMessage(
@@ -94,25 +103,98 @@ async def send_message(request: ChatRequest):
         "updated_at": datetime.now()
     }
     
+    if "intake_state" in result:
+        update_data["intake_state"] = result["intake_state"]
+    
     if result["is_summary"]:
         update_data["is_completed"] = True
         update_data["summary"] = result["response"]
     
-    chat_collection.update_one(
-        {"user_id": request.user_id, "is_completed": False},
-        {"$set": update_data}
-    )
+    with stage("mongo_write"):
+        await chat_collection.update_one(
+            {"user_id": user_id, "is_completed": False},
+            {"$set": update_data}
+        )
+
+async def load_active_chat(request: ChatRequest):
+    """The user's active chat and its messages with the new user message appended"""
+    
+    # Get chat history
+    with stage("mongo_read"):
+        chat = await chat_collection.find_one({
+            "user_id": request.user_id,
+            "is_completed": False
+        })
+    
+    if not chat:
+        raise HTTPException(status_code=404, detail="No active chat found. Please start a chat first.")
+    
+    # Convert stored messages to ChatMessage objects
+    messages = [ChatMessage.model_validate(msg) for msg in chat["messages"]]
+    
+    # Add user message
+    user_message = ChatMessage(role="user", content=request.message, timestamp=datetime.now())
+    messages.append(user_message)
+    
+    return chat, messages
+
+async def refresh_history_summary(chat: Dict, messages: List[ChatMessage]):
+    """Fold older messages into the chat's running summary, after the reply has been sent"""
+    summary = await chat_service.refresh_history_summary(messages, chat.get("history_summary"))
+    if summary is not None:
+        with stage("mongo_write"):
+            await chat_collection.update_one({"_id": chat["_id"]}, {"$set": {"history_summary": summary}})
+
+@router.post("/message", response_model=ChatResponse)
+async def send_message(request: ChatRequest, background_tasks: BackgroundTasks):
+    """Send a message and get response"""
+    
+    chat, messages = await load_active_chat(request)
+    
+    # Get response from chat service
+    result = await chat_service.process_message(request.message, messages, chat_id=str(chat["_id"]),
+                                                intake_state=chat.get("intake_state"),
+                                                history_summary=chat.get("history_summary"))
+    
+    await save_reply(request.user_id, messages, result)
+    if not result["is_summary"]:
+        background_tasks.add_task(refresh_history_summary, chat, messages)
     
     return ChatResponse(
         response=result["response"],
         is_summary=result["is_summary"]
     )
 
+@router.post("/message/stream")
+async def stream_message(request: ChatRequest, background_tasks: BackgroundTasks):
+    """Send a message and stream the response as Server-Sent Events.
+
+    Emits "token" events with text chunks, "reset" if the text shown so far
+    should be discarded (the summary follows), then "done" with the full
+    response once it has been saved, or "error".
+    """
+    started = time.perf_counter()
+    chat, messages = await load_active_chat(request)
+    
+    async def events():
+        async for event in chat_service.stream_message(request.message, messages, chat_id=str(chat["_id"]),
+                                                       intake_state=chat.get("intake_state"),
+                                                       history_summary=chat.get("history_summary")):
+            if event["event"] == "done":
+                await save_reply(request.user_id, messages, event)
+                if not event["is_summary"]:
+                    # Runs once the stream has finished
+                    background_tasks.add_task(refresh_history_summary, chat, messages)
+            yield event
+    
+    return StreamingResponse(stream_events(events(), started), media_type="text/event-stream", headers=SSE_HEADERS)
+
 @router.get("/history/{user_id}")
 async def get_chat_history(user_id: str):
     """Get chat history for a user"""
     
-    chats = list(chat_collection.find({"user_id": user_id}).sort("created_at", -1))
+    with stage("mongo_read"):
+        chats = await chat_collection.find({"user_id": user_id}).sort("created_at", -1).to_list(length=None)
     
     # Convert ObjectId to string
     for chat in chats:
@@ -125,10 +207,11 @@ async def get_chat_history(user_id: str):
 async def get_active_chat(user_id: str):
     """Get active (incomplete) chat for a user"""
     
-    chat = chat_collection.find_one({
-        "user_id": user_id,
-        "is_completed": False
-    })
+    with stage("mongo_read"):
+        chat = await chat_collection.find_one({
+            "user_id": user_id,
+            "is_completed": False
+        })
     
     if not chat:
         return {"active_chat": None}
@@ -139,18 +222,19 @@ async def get_active_chat(user_id: str):
 class DirectQuestionRequest(BaseModel):
     question: str
 
-@router.post("/ask")
-async def ask_direct_question(request: DirectQuestionRequest):
-    """Direct RAG-based question answering"""
-    try:
-        # Create mock chat history with the question
-        chat_history = [{"role": "user", "content": request.question}]
-
-        # Get RAG context
-        context = rag_service.get_rag_context(chat_history) or ""
-
-        # Create a prompt that uses the context
-        prompt = f"""You are Hazzy, an AI Health Assistant specialized in physiotherapy and general health awareness. 
+async def lookup_answer(question: str):
+    """(question embedding, cached answer or None); the embedding is only computed for semantic matching"""
+    if answer_cache is None:
+        return None, None
+    question_vector = None
+    if answer_cache.semantic:
+        # The embedding is reused by the RAG step through the query cache
+        question_vector = await blocking_executor.run(rag_service.store.embed_query, question)
+    return question_vector, answer_cache.lookup(question, question_vector)
+
+def ask_prompt(question: str, context: str) -> str:
+    """Prompt for a direct question, with the RAG context if any was found"""
+    prompt = f"""You are Hazzy, an AI Health Assistant specialized in physiotherapy and general health awareness. 
 When a user asks a question, provide a clear, short, and structured answer that includes:
 1. 2–3 common reasons or causes for the issue.
 2. 2–3 basic solutions or management tips that are physiotherapy-safe.
@@ -165,42 +249,75 @@ Example Format:
 **Basic Solutions:** ...
 **Consultation Advice:** ...
 
-User Question: {request.question}
+User Question: {question}
 """
-        prompt += f"""Context from physiotherapy knowledge base: {context}""" if context else ""  # Add context if available
-        # Generate response
-        response = gemini_llm.generate(prompt)
-
-        return {
-            "question": request.question,
-            "answer": response,
-            "context_found": len(context.strip()) > 0,
-            "context_length": len(context)
-        }
-
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error processing question: {str(e)}")
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+    prompt += f"""Context from physiotherapy knowledge base: {context}""" if context else ""  # Add context if available
+    return prompt
 
+def ask_result(question: str, context: str, answer: str) -> Dict:
+    return {
+        "question": question,
+        "answer": answer,
+        "context_found": len(context.strip()) > 0,
+        "context_length": len(context)
+    }
 
+@router.post("/ask")
+async def ask_direct_question(request: DirectQuestionRequest):
+    """Direct RAG-based question answering"""
+    try:
+        # Similar enough questions reuse a previous answer
+        question_vector, cached = await lookup_answer(request.question)
+        if cached is not None:
+            return {**cached, "question": request.question, "cached": True}
 
+        # Create mock chat history with the question
+        chat_history = [{"role": "user", "content": request.question}]
 
+        # Get RAG context
+        context = await blocking_executor.run(rag_service.get_rag_context, chat_history) or ""
 
+        # Generate response
+        response = await llm.generate_async(ask_prompt(request.question, context))
 
+        result = ask_result(request.question, context, response)
+        if answer_cache is not None:
+            answer_cache.store(request.question, result, question_vector)
 
+        return {**result, "cached": False}
 
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing question: {str(e)}")
 
+@router.post("/ask/stream")
+async def stream_direct_question(request: DirectQuestionRequest):
+    """/ask streamed as Server-Sent Events: "token" events, then "done" with the full result"""
+    started = time.perf_counter()
+    
+    async def events():
+        question_vector, cached = await lookup_answer(request.question)
+        if cached is not None:
+            yield {"event": "token", "text": cached["answer"]}
+            yield {"event": "done", **cached, "question": request.question, "cached": True}
+            return
+        
+        chat_history = [{"role": "user", "content": request.question}]
+        context = await blocking_executor.run(rag_service.get_rag_context, chat_history) or ""
+        answer = ""
+        async for chunk in llm.stream_async(ask_prompt(request.question, context)):
+            answer += chunk
+            yield {"event": "token", "text": chunk}
+        
+        result = ask_result(request.question, context, answer)
+        if answer_cache is not None:
+            answer_cache.store(request.question, result, question_vector)
+        yield {"event": "done", **result, "cached": False}
+    
+    return StreamingResponse(stream_events(events(), started), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@router.get("/ask/cache")
+async def answer_cache_stats():
+    """Hit rate and size of the /ask answer cache"""
+    if answer_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **answer_cache.stats()}
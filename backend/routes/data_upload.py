@@ -1,5 +1,7 @@
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-from backend.services.weaviate_store import weaviate_store
+from backend.services.vector_store import vector_store
+from backend.services.kb_version import knowledge_base_version
+from backend.services.executor import blocking_executor
 import json
 import csv
 from io import StringIO
@@ -8,6 +10,10 @@ import chardet
 
 router = APIRouter(prefix="/data", tags=["data"])
 
+def invalidate_answers():
+    """Cached /chat/ask answers may be outdated once the knowledge base changes (in every worker)"""
+    knowledge_base_version.bump()
+
 def safe_decode_content(content: bytes) -> str:
     """Safely decode file content with multiple encoding attempts"""
     # First check if content is empty or too small
@@ -91,8 +97,9 @@ async def upload_assessment(
                 "category": category
             }]
         
-        # Add to Weaviate
-        weaviate_store.add_batch_documents(documents)
+        # Add to the vector store
+        await blocking_executor.run(vector_store.add_batch_documents, documents, workers=0)
+        invalidate_answers()
         
         return {
             "message": f"Successfully uploaded {len(documents)} assessment documents",
@@ -153,8 +160,9 @@ async def upload_exercise(
                 "category": category
             }]
         
-        # Add to Weaviate
-        weaviate_store.add_batch_documents(documents)
+        # Add to the vector store
+        await blocking_executor.run(vector_store.add_batch_documents, documents, workers=0)
+        invalidate_answers()
         
         return {
             "message": f"Successfully uploaded {len(documents)} exercise documents",
@@ -177,7 +185,8 @@ async def upload_text_data(
         raise HTTPException(status_code=400, detail="Type must be 'assessment' or 'exercise'")
     
     try:
-        weaviate_store.add_document(content, data_type, category)
+        await blocking_executor.run(vector_store.add_document, content, data_type, category)
+        invalidate_answers()
         
         return {
             "message": f"Successfully uploaded {data_type} data",
@@ -0,0 +1,152 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from backend.config import Config
+from backend.services.kb_version import knowledge_base_version
+
+def normalize_question(text: str) -> str:
+    """Case, whitespace and trailing punctuation don't change what is being asked"""
+    return re.sub(r"[\s?.!]+$", "", " ".join(text.lower().split()))
+
+class AnswerCache:
+    """Answers to direct questions, reused for the same question.
+
+    Questions match on their normalized text. With ``threshold`` set, a
+    question can also match on cosine similarity of its embedding: vectors
+    live in a preallocated (max_entries, dim) matrix of unit vectors, so a
+    lookup is one matrix-vector product, and the best live match must reach
+    the threshold. Only enable that with a threshold validated by
+    ``python -m benchmarks.answer_cache_calibration``; raw BioBERT cosines
+    are high even for different questions. When full, the least recently
+    used answer is evicted.
+
+    Answers are tied to the knowledge base version they were generated
+    under: every lookup compares the shared version, so an upload or ingest
+    (which bump it) handled by any process empties the cache in all of them.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, threshold: Optional[float] = None, version=None):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.version = version or knowledge_base_version
+        self._lock = threading.Lock()
+
+        self._vectors: Optional[np.ndarray] = None  # allocated on the first store with a vector
+        self._expires = np.zeros(max_entries, dtype=np.float64)  # 0 marks a free slot
+        self._entries: "OrderedDict[int, Dict]" = OrderedDict()  # slot -> answer, least recently used first
+        self._questions: Dict[str, int] = {}  # normalized question -> slot
+        self._slot_questions: Dict[int, str] = {}
+        self._kb_version = self.version.current()
+
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def semantic(self) -> bool:
+        """Whether lookups also match similar questions (and so need the question embedding)"""
+        return self.threshold is not None
+
+    @staticmethod
+    def _unit(vector: List[float]) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def _check_version(self):
+        """Drop everything if the knowledge base changed since the answers were generated"""
+        current = self.version.current()
+        if current != self._kb_version:
+            self._clear()
+            self._kb_version = current
+
+    def _clear(self):
+        self._entries.clear()
+        self._questions.clear()
+        self._slot_questions.clear()
+        self._expires[:] = 0
+        self.invalidations += 1
+
+    def _free(self, slot: int):
+        self._entries.pop(slot, None)
+        question = self._slot_questions.pop(slot, None)
+        if question is not None and self._questions.get(question) == slot:
+            del self._questions[question]
+
+    def lookup(self, question: str, vector: Optional[List[float]] = None) -> Optional[Dict]:
+        """Cached answer for the same question, or (semantic mode) the most similar one if similar enough"""
+        with self._lock:
+            self._check_version()
+            now = time.monotonic()
+
+            slot = self._questions.get(normalize_question(question))
+            if slot is not None and self._expires[slot] >= now:
+                self._entries.move_to_end(slot)
+                self.hits += 1
+                return dict(self._entries[slot])
+
+            if not self.semantic or vector is None or self._vectors is None or not self._entries:
+                self.misses += 1
+                return None
+
+            scores = self._vectors @ self._unit(vector)
+            scores[self._expires < now] = -np.inf
+            slot = int(np.argmax(scores))
+            if scores[slot] < self.threshold:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(slot)
+            self.hits += 1
+            self.semantic_hits += 1
+            return dict(self._entries[slot], similarity=float(scores[slot]))
+
+    def store(self, question: str, answer: Dict, vector: Optional[List[float]] = None):
+        with self._lock:
+            self._check_version()
+            now = time.monotonic()
+            key = normalize_question(question)
+            slot = self._questions.get(key)
+            if slot is None:
+                free = np.flatnonzero(self._expires < now)
+                slot = int(free[0]) if len(free) else next(iter(self._entries))
+            self._free(slot)
+
+            if self.semantic and vector is not None:
+                unit = self._unit(vector)
+                if self._vectors is None:
+                    self._vectors = np.zeros((self.max_entries, len(unit)), dtype=np.float32)
+                self._vectors[slot] = unit
+            elif self._vectors is not None:
+                self._vectors[slot] = 0.0
+
+            self._expires[slot] = now + self.ttl_seconds
+            self._entries[slot] = answer
+            self._questions[key] = slot
+            self._slot_questions[slot] = key
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "threshold": self.threshold
+        }
+
+# Singleton instance (None when disabled)
+answer_cache = AnswerCache(
+    max_entries=Config.ANSWER_CACHE_MAX_ENTRIES,
+    ttl_seconds=Config.ANSWER_CACHE_TTL_SECONDS,
+    threshold=Config.ANSWER_CACHE_THRESHOLD if Config.ANSWER_CACHE_SEMANTIC_ENABLED else None
+) if Config.ANSWER_CACHE_ENABLED else None
@@ -1,33 +1,177 @@
-from transformers import AutoTokenizer, AutoModel
+import numpy as np
 import torch
-from typing import List
+import time
+from typing import Dict, List, Optional
 from backend.config import Config
+from backend.services.embedding_cache import embedding_cache
+from backend.services.onnx_backend import OnnxEncoder, cosine_parity
+from backend.services.registry import registry
+from backend.services.telemetry import log_event, stage
+from backend.services.vector_postprocess import vector_postprocessor
 
 class BioBERTEmbedder:
-    def __init__(self):
+    def __init__(self, backend: Optional[str] = None, use_cache: bool = True, verbose: bool = True):
+        # Imported here so importing the app doesn't pay for transformers
+        from transformers import AutoTokenizer, AutoModel
+
+        self.backend = backend or Config.EMBEDDING_BACKEND
         self.tokenizer = AutoTokenizer.from_pretrained(Config.BIOBERT_MODEL)
-        self.model = AutoModel.from_pretrained(Config.BIOBERT_MODEL)
-        self.model.eval()
-        
-    def get_embedding(self, text: str) -> List[float]:
-        """Generate BioBERT embedding for a single text"""
-        inputs = self.tokenizer(text, return_tensors="pt", 
-                               padding=True, truncation=True, 
-                               max_length=512)
-        
+        self.model = None
+        self.onnx_encoder = None
+
+        if self.backend == "onnx":
+            self.onnx_encoder = OnnxEncoder(Config.BIOBERT_MODEL, Config.ONNX_MODEL_DIR,
+                                            num_threads=Config.ONNX_NUM_THREADS)
+        elif self.backend == "torch":
+            self.model = AutoModel.from_pretrained(Config.BIOBERT_MODEL)
+            self.model.eval()
+        else:
+            raise ValueError(f"Unknown EMBEDDING_BACKEND '{self.backend}', expected 'torch' or 'onnx'")
+
+        self.model_id = self.model_id_for(self.backend)
+        self.max_length = Config.EMBEDDING_MAX_LENGTH
+        self.batch_size = Config.EMBEDDING_BATCH_SIZE
+        self.cache = embedding_cache if use_cache else None
+        self.postprocessor = vector_postprocessor
+        self.verbose = verbose
+        self.last_batch_stats: Dict = {}
+
+    @staticmethod
+    def model_id_for(backend: str) -> str:
+        """Identifier used in cache keys; quantized vectors differ slightly so they get their own"""
+        if backend == "onnx":
+            return f"{Config.BIOBERT_MODEL}:onnx-int8"
+        return Config.BIOBERT_MODEL
+
+    def _cache_key(self, text: str) -> str:
+        return self.cache.make_key(self.model_id, text, self.max_length)
+
+    def _mean_pool(self, last_hidden_state: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+        """Mean pooling over real tokens only, so padding doesn't skew the vector"""
+        mask = attention_mask.unsqueeze(-1).to(last_hidden_state.dtype)
+        summed = (last_hidden_state * mask).sum(dim=1)
+        counts = mask.sum(dim=1).clamp(min=1e-9)
+        return summed / counts
+
+    def _forward(self, inputs) -> torch.Tensor:
+        """Run one forward pass over already tokenized (and padded) inputs"""
+        if self.onnx_encoder is not None:
+            hidden = self.onnx_encoder.last_hidden_state({name: tensor.numpy() for name, tensor in inputs.items()})
+            return self._mean_pool(torch.from_numpy(hidden), inputs["attention_mask"])
+
         with torch.no_grad():
             outputs = self.model(**inputs)
-            # Use mean pooling of last hidden state
-            embeddings = outputs.last_hidden_state.mean(dim=1)
-            
-        return embeddings[0].tolist()
-    
-    def get_batch_embeddings(self, texts: List[str]) -> List[List[float]]:
-        """Generate BioBERT embeddings for multiple texts"""
-        embeddings = []
-        for text in texts:
-            embeddings.append(self.get_embedding(text))
-        return embeddings
-
-# Singleton instance
-biobert_embedder = BioBERTEmbedder()
\ No newline at end of file
+        return self._mean_pool(outputs.last_hidden_state, inputs["attention_mask"])
+
+    def _postprocess(self, embeddings: List[List[float]]) -> List[List[float]]:
+        if self.postprocessor.is_identity:
+            return embeddings
+        return self.postprocessor.apply(np.asarray(embeddings, dtype=np.float32)).tolist()
+
+    def get_embedding(self, text: str, postprocess: bool = True) -> List[float]:
+        """Generate BioBERT embedding for a single text (queries: not stored in the corpus cache)"""
+        with stage("tokenize"):
+            inputs = self.tokenizer(text, return_tensors="pt",
+                                   padding=True, truncation=True,
+                                   max_length=self.max_length)
+
+        with stage("embed"):
+            embedding = self._forward(inputs)[0].tolist()
+
+        return self._postprocess([embedding])[0] if postprocess else embedding
+
+    def get_batch_embeddings(self, texts: List[str], batch_size: Optional[int] = None,
+                             postprocess: bool = True, use_cache: bool = True) -> List[List[float]]:
+        """Generate BioBERT embeddings for multiple texts with batched forward passes.
+
+        The cache holds raw model output; post-processing (PCA, normalization,
+        float16) is applied on the way out unless postprocess is False.
+        Queries pass use_cache=False: the persistent cache is for corpus
+        text, and the query cache already covers repeated queries.
+        """
+        if not texts:
+            return []
+
+        batch_size = batch_size or self.batch_size
+        start = time.perf_counter()
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
+
+        # Serve whatever we have already embedded from the cache
+        cache = self.cache if use_cache else None
+        keys = []
+        if cache is not None:
+            keys = [self._cache_key(text) for text in texts]
+            cached = cache.get_many(keys)
+            for i, key in enumerate(keys):
+                embeddings[i] = cached.get(key)
+        pending = [i for i, embedding in enumerate(embeddings) if embedding is None]
+
+        batches = 0
+        if pending:
+            # Tokenize once without padding, then bucket by length so each batch
+            # is only padded up to its own longest member
+            with stage("tokenize"):
+                encoded = self.tokenizer([texts[i] for i in pending], truncation=True, max_length=self.max_length)
+            order = sorted(range(len(pending)), key=lambda j: len(encoded["input_ids"][j]))
+
+            with stage("embed"):
+                for offset in range(0, len(order), batch_size):
+                    positions = order[offset:offset + batch_size]
+                    features = [{key: encoded[key][j] for key in encoded.keys()} for j in positions]
+                    inputs = self.tokenizer.pad(features, return_tensors="pt")
+
+                    vectors = self._forward(inputs)
+                    for j, vector in zip(positions, vectors):
+                        embeddings[pending[j]] = vector.tolist()
+                    batches += 1
+
+            if cache is not None:
+                cache.put_many({keys[i]: embeddings[i] for i in pending})
+                cache.flush()
+
+        elapsed = time.perf_counter() - start
+        self.last_batch_stats = {
+            "documents": len(texts),
+            "embedded": len(pending),
+            "cache_hits": len(texts) - len(pending),
+            "batches": batches,
+            "batch_size": batch_size,
+            "seconds": elapsed,
+            "docs_per_second": len(texts) / elapsed if elapsed > 0 else 0.0
+        }
+        if self.verbose:
+            log_event("embed.batch", **self.last_batch_stats)
+
+        return self._postprocess(embeddings) if postprocess else embeddings
+
+    def warmup(self):
+        """Run one uncached forward pass so the first real request isn't slow"""
+        inputs = self.tokenizer("warmup", return_tensors="pt", truncation=True, max_length=self.max_length)
+        self._forward(inputs)
+
+    @classmethod
+    def parity_check(cls, texts: List[str]) -> Dict:
+        """Compare int8 ONNX vectors against fp32 PyTorch ones on the same texts"""
+        reference = cls(backend="torch", use_cache=False)
+        quantized = cls(backend="onnx", use_cache=False)
+
+        # Warm both up so one-time initialisation doesn't count as latency
+        reference.get_embedding(texts[0])
+        quantized.get_embedding(texts[0])
+
+        torch_vectors = np.array(reference.get_batch_embeddings(texts, postprocess=False))
+        torch_seconds = reference.last_batch_stats["seconds"]
+        onnx_vectors = np.array(quantized.get_batch_embeddings(texts, postprocess=False))
+        onnx_seconds = quantized.last_batch_stats["seconds"]
+
+        report = cosine_parity(torch_vectors, onnx_vectors)
+        report.update({
+            "torch_seconds": torch_seconds,
+            "onnx_seconds": onnx_seconds,
+            "speedup": torch_seconds / onnx_seconds if onnx_seconds > 0 else 0.0
+        })
+        return report
+
+# Singleton instance (built on first use or during app warmup)
+biobert_embedder = registry.register("biobert_embedder", BioBERTEmbedder,
+                                     warmup=lambda embedder: embedder.warmup())
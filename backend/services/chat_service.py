@@ -1,81 +1,336 @@
-from typing import Dict, List
-from backend.services.gemini_llm import gemini_llm
+import asyncio
+import logging
+from typing import AsyncIterator, Dict, List, Optional
+from backend.config import Config
+from backend.services.llm import llm
 from backend.services.rag_service import rag_service
+from backend.services.rag_prefetch import rag_prefetcher
+from backend.services.executor import blocking_executor
+from backend.services.history import format_messages, history_compactor
+from backend.services.intake import apply_updates, is_complete, load_state, may_contain_json, parse_intake_reply
+from backend.services.telemetry import log_event
 from backend.prompts.greeting_prompt import get_greeting
 from backend.prompts.info_gathering_prompt import get_info_gathering_prompt
+from backend.prompts.intake_prompt import get_intake_prompt
 from backend.prompts.summary_prompt import get_summary_prompt
 from backend.models.chat import ChatMessage
 from datetime import datetime
 
+COMPLETION_MARKER = "INFORMATION_COMPLETE"
+
+# Transcript intake only asks the model whether it is done from this many user messages on
+COMPLETENESS_CHECK_AFTER = 5
+
+# Slots intake starts prefetching the summary context once these fields are known
+PREFETCH_FIELDS = ("complaint", "location")
+
+def marker_prefix_length(text: str) -> int:
+    """Length of the longest end of text that could be the start of COMPLETION_MARKER"""
+    for length in range(min(len(COMPLETION_MARKER) - 1, len(text)), 0, -1):
+        if text.endswith(COMPLETION_MARKER[:length]):
+            return length
+    return 0
+
 class ChatService:
     def __init__(self):
-        self.llm = gemini_llm
+        self.llm = llm
         self.rag = rag_service
+        self.prefetcher = rag_prefetcher
+        # chat_id -> the running per-turn retrieval of that chat
+        self._tracking: Dict[str, asyncio.Task] = {}
+        self.history = history_compactor
     
     def get_greeting_message(self) -> str:
         """Return initial greeting"""
         return get_greeting()
     
+    def to_dicts(self, chat_history: List[ChatMessage]) -> List[Dict]:
+        """Convert chat history to dict format for RAG"""
+        return [{"role": msg.role, "content": msg.content} for msg in chat_history]
+    
     def format_chat_history(self, messages: List[ChatMessage]) -> str:
         """Format chat messages for prompts"""
-        formatted = []
-        for msg in messages:
-            formatted.append(f"{msg.role.capitalize()}: {msg.content}")
-        return "\n".join(formatted)
+        return format_messages(messages)
+    
+    def conversation_text(self, chat_history: List[ChatMessage], history_summary: Optional[Dict] = None,
+                          facts_tracked: bool = False) -> str:
+        """Chat history for the intake prompts, compacted when HISTORY_COMPACTION_ENABLED"""
+        if self.history is None:
+            return self.format_chat_history(chat_history)
+        
+        text = self.history.render(chat_history, history_summary, facts_tracked)
+        log_event("chat.history", messages=len(chat_history), chars=len(self.format_chat_history(chat_history)),
+                  sent_chars=len(text))
+        return text
+    
+    async def refresh_history_summary(self, chat_history: List[ChatMessage],
+                                      history_summary: Optional[Dict]) -> Optional[Dict]:
+        """Fold the next batch of older messages into the running summary; None when nothing is due.
+
+        Only transcript intake uses the summary (slots intake keeps the facts in
+        intake_state), and it is meant to run after the reply has been sent.
+        """
+        if self.history is None or Config.INTAKE_MODE == "slots":
+            return None
+        compaction = self.history.compaction(chat_history, history_summary)
+        if compaction is None:
+            return None
+        
+        prompt, covered = compaction
+        text = await self.llm.generate_async(prompt)
+        log_event("chat.history_summary", messages=covered, chars=len(text))
+        return {"text": text.strip(), "messages": covered}
+    
+    def intake_finished(self, state: Dict[str, Optional[str]], chat_history: List[ChatMessage]) -> bool:
+        """All intake fields known, or the patient has answered as many times as we let intake run"""
+        user_messages = [msg for msg in chat_history if msg.role == 'user']
+        return is_complete(state) or len(user_messages) >= Config.INTAKE_MAX_USER_MESSAGES
     
-    def process_message(self, message: str, chat_history: List[ChatMessage]) -> Dict:
-        """Process user message and return response"""
+    def intake_prompt(self, chat_history: List[ChatMessage], state: Dict[str, Optional[str]]) -> str:
+        return get_intake_prompt(self.conversation_text(chat_history, facts_tracked=True), state)
+    
+    def prefetch_due(self, chat_history: List[ChatMessage], intake_state: Optional[Dict]) -> bool:
+        """Whether the summary may come soon enough to assemble its context speculatively"""
+        if Config.INTAKE_MODE == "slots":
+            state = load_state(intake_state)
+            return all(state[field] for field in PREFETCH_FIELDS)
+        user_messages = [msg for msg in chat_history if msg.role == 'user']
+        return len(user_messages) >= COMPLETENESS_CHECK_AFTER
+    
+    def track_conversation(self, chat_history: List[ChatMessage], chat_id: Optional[str],
+                           intake_state: Optional[Dict] = None):
+        """Embed and search just this turn's message in the background, so the summary only adds
+        the consolidated query. Runs while the turn's LLM call does; turns of one chat run in order.
+
+        Once prefetch is due, the whole summary context is assembled in the
+        background instead.
+        """
+        if chat_id is None:
+            return
+        previous = self._tracking.pop(chat_id, None)
+        if self.prefetcher is not None and self.prefetch_due(chat_history, intake_state):
+            self.prefetcher.start(chat_id, self.to_dicts(chat_history), after=previous)
+            return
+        
+        task = asyncio.create_task(self._track(chat_id, self.to_dicts(chat_history), previous))
+        self._tracking[chat_id] = task
+        task.add_done_callback(lambda done: self._tracking.pop(chat_id, None) if self._tracking.get(chat_id) is done else None)
+    
+    async def _track(self, chat_id: str, chat_history: List[Dict], previous: Optional[asyncio.Task]):
+        if previous is not None:
+            await asyncio.wait([previous])
+        try:
+            await blocking_executor.run(self.rag.update_conversation, chat_id, chat_history)
+        except Exception as e:
+            # The summary rebuilds whatever is missing
+            log_event("rag.track_failed", level=logging.WARNING, chat_id=chat_id, error=str(e))
+    
+    async def wait_for_tracking(self, chat_id: str):
+        """Let the chat's last per-turn retrieval finish before its state is read"""
+        task = self._tracking.pop(chat_id, None)
+        if task is not None:
+            await asyncio.wait([task])
+    
+    async def forget(self, chat_id: str):
+        """Drop a finished chat's retrieval state, after any background retrieval that could write it back"""
+        if self.prefetcher is not None:
+            await self.prefetcher.discard(chat_id)
+        await self.wait_for_tracking(chat_id)
+        self.rag.forget_conversation(chat_id)
+    
+    async def process_message(self, message: str, chat_history: List[ChatMessage], chat_id: Optional[str] = None,
+                              intake_state: Optional[Dict] = None, history_summary: Optional[Dict] = None) -> Dict:
+        """Process user message and return response.
+
+        With INTAKE_MODE=slots the result also carries the updated
+        ``intake_state``, which the caller stores with the chat.
+        ``history_summary`` is the chat's running summary for compaction.
+        """
+        self.track_conversation(chat_history, chat_id, intake_state)
+        
+        if Config.INTAKE_MODE == "slots":
+            return await self.intake_turn(chat_history, intake_state, chat_id)
         
         # Check if we have enough information (basic heuristic)
         user_messages = [msg for msg in chat_history if msg.role == 'user']
+        if len(user_messages) >= Config.INTAKE_MAX_USER_MESSAGES:
+            return await self.generate_summary(chat_history, chat_id)
         
         # If we have at least 5 exchanges, check if info gathering is complete
-        if len(user_messages) >= 5:
+        if len(user_messages) >= COMPLETENESS_CHECK_AFTER:
             # Prepare prompt to check completeness
-            chat_text = self.format_chat_history(chat_history)
+            chat_text = self.conversation_text(chat_history, history_summary)
             prompt = get_info_gathering_prompt(chat_text)
             
-            response = self.llm.generate(prompt)
+            response = await self.llm.generate_async(prompt)
             
-            if "INFORMATION_COMPLETE" in response:
+            if COMPLETION_MARKER in response:
                 # Generate summary
-                return self.generate_summary(chat_history)
+                return await self.generate_summary(chat_history, chat_id)
         
         # Continue information gathering
-        chat_text = self.format_chat_history(chat_history)
+        chat_text = self.conversation_text(chat_history, history_summary)
         prompt = get_info_gathering_prompt(chat_text)
         
-        response = self.llm.generate(prompt)
+        response = await self.llm.generate_async(prompt)
         
         # Check again if complete
-        if "INFORMATION_COMPLETE" in response:
-            return self.generate_summary(chat_history)
+        if COMPLETION_MARKER in response:
+            return await self.generate_summary(chat_history, chat_id)
         
         return {
             "response": response,
             "is_summary": False
         }
     
-    def generate_summary(self, chat_history: List[ChatMessage]) -> Dict:
-        """Generate final summary using RAG"""
+    async def intake_turn(self, chat_history: List[ChatMessage], intake_state: Optional[Dict],
+                          chat_id: Optional[str] = None) -> Dict:
+        """One LLM call extracts what the latest message answered and writes the next question;
+        whether intake is complete is decided here from the state"""
+        state = load_state(intake_state)
+        response = await self.llm.generate_async(self.intake_prompt(chat_history, state))
         
-        # Convert chat history to dict format for RAG
-        chat_dicts = [{"role": msg.role, "content": msg.content} for msg in chat_history]
+        parsed = parse_intake_reply(response)
+        if parsed is None:
+            log_event("intake.unparsed", level=logging.WARNING, response=response[:200])
+            parsed = ({}, response.strip())
+        updates, reply = parsed
+        state = apply_updates(state, updates)
         
-        # Get RAG context
-        rag_context = self.rag.get_rag_context(chat_dicts)
+        if self.intake_finished(state, chat_history):
+            return {**await self.generate_summary(chat_history, chat_id), "intake_state": state}
+        
+        return {
+            "response": reply,
+            "is_summary": False,
+            "intake_state": state
+        }
+    
+    async def summary_prompt(self, chat_history: List[ChatMessage], chat_id: Optional[str] = None) -> str:
+        """Summary prompt with the RAG context for the whole conversation"""
+        
+        # Get RAG context (prefetched during intake, or merging the hits accumulated during the conversation)
+        rag_context = None
+        if chat_id is not None and self.prefetcher is not None:
+            rag_context = await self.prefetcher.context(chat_id, self.to_dicts(chat_history))
+        if rag_context is None:
+            if chat_id is not None:
+                await self.wait_for_tracking(chat_id)
+            rag_context = await blocking_executor.run(self.rag.get_rag_context, self.to_dicts(chat_history), chat_id)
+        if chat_id is not None:
+            await self.forget(chat_id)
         
         # Format chat transcript
         chat_transcript = self.format_chat_history(chat_history)
         
-        # Generate summary
-        prompt = get_summary_prompt(chat_transcript, rag_context)
-        summary = self.llm.generate(prompt)
+        return get_summary_prompt(chat_transcript, rag_context)
+    
+    async def generate_summary(self, chat_history: List[ChatMessage], chat_id: Optional[str] = None) -> Dict:
+        """Generate final summary using RAG"""
+        summary = await self.llm.generate_async(await self.summary_prompt(chat_history, chat_id))
         
         return {
             "response": summary,
             "is_summary": True
         }
+    
+    async def stream_message(self, message: str, chat_history: List[ChatMessage], chat_id: Optional[str] = None,
+                             intake_state: Optional[Dict] = None,
+                             history_summary: Optional[Dict] = None) -> AsyncIterator[Dict]:
+        """process_message as events: {"event": "token", "text": ...} chunks, then
+        {"event": "done", "response": ..., "is_summary": ...} with the full reply.
+
+        Text that could be the start of INFORMATION_COMPLETE is held back until
+        the next chunk settles it, so the marker never reaches the client. If
+        it turns up after some text was already sent, a {"event": "reset"}
+        tells the client to discard it before the summary streams.
+        """
+        self.track_conversation(chat_history, chat_id, intake_state)
+        
+        if Config.INTAKE_MODE == "slots":
+            async for event in self.stream_intake_turn(chat_history, intake_state, chat_id):
+                yield event
+            return
+        
+        # Same completeness check (and cap) as process_message
+        user_messages = [msg for msg in chat_history if msg.role == 'user']
+        if len(user_messages) >= Config.INTAKE_MAX_USER_MESSAGES:
+            async for event in self.stream_summary(chat_history, chat_id):
+                yield event
+            return
+        
+        chat_text = self.conversation_text(chat_history, history_summary)
+        prompt = get_info_gathering_prompt(chat_text)
+        
+        if len(user_messages) >= COMPLETENESS_CHECK_AFTER and COMPLETION_MARKER in await self.llm.generate_async(prompt):
+            async for event in self.stream_summary(chat_history, chat_id):
+                yield event
+            return
+        
+        response = ""
+        sent = 0
+        async for chunk in self.llm.stream_async(prompt):
+            response += chunk
+            if COMPLETION_MARKER in response:
+                if sent:
+                    yield {"event": "reset"}
+                async for event in self.stream_summary(chat_history, chat_id):
+                    yield event
+                return
+            if not response.strip():
+                continue
+            ready = len(response) - marker_prefix_length(response)
+            if ready > sent:
+                yield {"event": "token", "text": response[sent:ready]}
+                sent = ready
+        
+        if sent < len(response):
+            yield {"event": "token", "text": response[sent:]}
+        yield {"event": "done", "response": response, "is_summary": False}
+    
+    async def stream_intake_turn(self, chat_history: List[ChatMessage], intake_state: Optional[Dict],
+                                 chat_id: Optional[str] = None) -> AsyncIterator[Dict]:
+        """intake_turn as events. The field updates come first in the response, so
+        completion is known before any text is sent; the model's stream is then
+        dropped and the summary streams instead."""
+        state = load_state(intake_state)
+        stream = self.llm.stream_async(self.intake_prompt(chat_history, state))
+        
+        response = ""
+        reply = None
+        sent = 0
+        async for chunk in stream:
+            response += chunk
+            parsed = parse_intake_reply(response) if may_contain_json(response) else ({}, response.strip())
+            if parsed is None:
+                continue
+            
+            if reply is None:
+                state = apply_updates(state, parsed[0])
+                if self.intake_finished(state, chat_history):
+                    await stream.aclose()
+                    async for event in self.stream_summary(chat_history, chat_id):
+                        yield {**event, "intake_state": state} if event["event"] == "done" else event
+                    return
+            
+            reply = parsed[1]
+            if len(reply) > sent:
+                yield {"event": "token", "text": reply[sent:]}
+                sent = len(reply)
+        
+        if reply is None:
+            log_event("intake.unparsed", level=logging.WARNING, response=response[:200])
+            reply = response.strip()
+            yield {"event": "token", "text": reply}
+        yield {"event": "done", "response": reply, "is_summary": False, "intake_state": state}
+    
+    async def stream_summary(self, chat_history: List[ChatMessage], chat_id: Optional[str] = None) -> AsyncIterator[Dict]:
+        """generate_summary as token events followed by a done event"""
+        summary = ""
+        async for chunk in self.llm.stream_async(await self.summary_prompt(chat_history, chat_id)):
+            summary += chunk
+            yield {"event": "token", "text": chunk}
+        yield {"event": "done", "response": summary, "is_summary": True}
 
 # Singleton instance
 chat_service = ChatService()
\ No newline at end of file
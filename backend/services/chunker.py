@@ -0,0 +1,78 @@
+import hashlib
+from typing import Dict, List
+
+from backend.config import Config
+from backend.services.registry import registry
+
+class TokenChunker:
+    """Split documents into overlapping windows measured in BioBERT tokens.
+
+    Chunk boundaries come from the tokenizer's character offsets, so each
+    chunk is an exact slice of the original text and fits in one forward
+    pass without truncation.
+    """
+
+    def __init__(self, max_tokens: int, overlap: int):
+        # Imported here so importing the app doesn't pay for transformers
+        from transformers import AutoTokenizer
+
+        if overlap >= max_tokens:
+            raise ValueError("CHUNK_OVERLAP_TOKENS must be smaller than CHUNK_MAX_TOKENS")
+        self.tokenizer = AutoTokenizer.from_pretrained(Config.BIOBERT_MODEL)
+        self.max_tokens = max_tokens
+        self.overlap = overlap
+
+    def split(self, text: str) -> List[str]:
+        """Return the text as a list of token windows (a single item if it already fits)"""
+        offsets = self.tokenizer(text, add_special_tokens=False, return_offsets_mapping=True,
+                                 verbose=False)["offset_mapping"]
+        if len(offsets) <= self.max_tokens:
+            return [text]
+
+        chunks = []
+        stride = self.max_tokens - self.overlap
+        for start in range(0, len(offsets), stride):
+            window = offsets[start:start + self.max_tokens]
+            chunks.append(text[window[0][0]:window[-1][1]])
+            if start + self.max_tokens >= len(offsets):
+                break
+        return chunks
+
+    def chunk_documents(self, documents: List[Dict]) -> List[Dict]:
+        """Expand documents into chunk objects linked to their parent by parent_id"""
+        chunked = []
+        for doc in documents:
+            parent_id = document_id(doc['content'])
+            pieces = self.split(doc['content'])
+            for index, piece in enumerate(pieces):
+                chunked.append({
+                    "content": piece,
+                    "type": doc['type'],
+                    "category": doc.get('category', ''),
+                    "parent_id": parent_id,
+                    "chunk_index": index,
+                    "chunk_count": len(pieces)
+                })
+        return chunked
+
+def document_id(content: str) -> str:
+    """Stable identifier for a document, shared by all of its chunks"""
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+def collapse_to_parents(hits: List[Dict]) -> List[Dict]:
+    """Keep only the best-ranked chunk hit for each parent document"""
+    seen = set()
+    collapsed = []
+    for hit in hits:
+        parent = hit.get("parent_id") or hit.get("content")
+        if parent in seen:
+            continue
+        seen.add(parent)
+        collapsed.append(hit)
+    return collapsed
+
+# Singleton instance (built on first use or during app warmup)
+document_chunker = registry.register(
+    "document_chunker",
+    lambda: TokenChunker(Config.CHUNK_MAX_TOKENS, Config.CHUNK_OVERLAP_TOKENS)
+)
@@ -0,0 +1,237 @@
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from backend.config import Config
+from backend.services.file_lock import file_lock
+
+class EmbeddingCache:
+    """Persistent content-addressed embedding cache, safe to share between processes.
+
+    Vectors live in a fixed-size memory-mapped float32 matrix
+    (``vectors.f32``). Each row's key (the raw sha256 digest) is stored next
+    to it in ``keys.bin`` and its last use in ``used.i64`` (whose extra last
+    element counts writes, so readers know when to look again), so the files
+    themselves are the index: a read only trusts a row whose stored key
+    matches, and a fresh process rebuilds its key -> row map from
+    ``keys.bin``. Rows are allocated (free row first, then least recently
+    used) under an exclusive lock on ``cache.lock``, so the server, its
+    workers, the ingest CLI and the embedding pool can all use one
+    directory. ``index.json`` only records the matrix layout.
+    """
+
+    VECTORS_FILE = "vectors.f32"
+    KEYS_FILE = "keys.bin"
+    USED_FILE = "used.i64"
+    INDEX_FILE = "index.json"
+    LOCK_FILE = "cache.lock"
+    KEY_BYTES = 32
+
+    def __init__(self, cache_dir: str, max_entries: int, flush_every: int = 256):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.flush_every = flush_every
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._dim: Optional[int] = None
+        self._vectors: Optional[np.memmap] = None
+        self._keys: Optional[np.memmap] = None
+        self._used: Optional[np.memmap] = None
+        self._slots: Dict[bytes, int] = {}
+        self._generation = -1  # write counter when _slots was last rebuilt
+        self._dirty = 0
+
+        self._load_index()
+        atexit.register(self.flush)
+
+    @staticmethod
+    def make_key(model_name: str, text: str, max_length: int) -> str:
+        """Hash of everything that determines the vector for a text"""
+        payload = f"{model_name}\x00{max_length}\x00{text}".encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.cache_dir, name)
+
+    def _file_lock(self):
+        """Exclusive lock shared by every process using this cache directory"""
+        return file_lock(self._path(self.LOCK_FILE))
+
+    def _layout_matches(self, dim: int) -> bool:
+        """Whether the files on disk hold a max_entries x dim cache"""
+        try:
+            with open(self._path(self.INDEX_FILE), "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if index.get("max_entries") != self.max_entries or index.get("dim") != dim or "entries" in index:
+            # Other capacity, other model, or the single-process format without row keys
+            return False
+        sizes = {
+            self.VECTORS_FILE: self.max_entries * dim * np.dtype(np.float32).itemsize,
+            self.KEYS_FILE: self.max_entries * self.KEY_BYTES,
+            self.USED_FILE: (self.max_entries + 1) * np.dtype(np.int64).itemsize
+        }
+        return all(os.path.exists(self._path(name)) and os.path.getsize(self._path(name)) == size
+                   for name, size in sizes.items())
+
+    def _load_index(self):
+        """Open the cache written by a previous (or concurrent) process"""
+        try:
+            with open(self._path(self.INDEX_FILE), "r", encoding="utf-8") as f:
+                dim = json.load(f).get("dim")
+        except (OSError, ValueError):
+            return
+        if dim and self._layout_matches(dim):
+            self._map(dim, "r+")
+            self._rebuild_slots()
+
+    def _map(self, dim: int, mode: str):
+        self._vectors = np.memmap(self._path(self.VECTORS_FILE), dtype=np.float32, mode=mode,
+                                  shape=(self.max_entries, dim))
+        self._keys = np.memmap(self._path(self.KEYS_FILE), dtype=np.uint8, mode=mode,
+                               shape=(self.max_entries, self.KEY_BYTES))
+        self._used = np.memmap(self._path(self.USED_FILE), dtype=np.int64, mode=mode, shape=(self.max_entries + 1,))
+        self._dim = dim
+
+    def _open(self, dim: int):
+        """Open the vector matrix for vectors of size dim, creating it if no process has yet"""
+        with self._file_lock():
+            if self._layout_matches(dim):
+                self._map(dim, "r+")
+            else:
+                self._map(dim, "w+")
+                self._vectors.flush()
+                self._keys.flush()
+                self._used.flush()
+                tmp_path = self._path(self.INDEX_FILE) + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump({"dim": dim, "max_entries": self.max_entries}, f)
+                os.replace(tmp_path, self._path(self.INDEX_FILE))
+        self._rebuild_slots()
+
+    def _rebuild_slots(self):
+        """key -> row map from the row keys, picking up rows other processes wrote"""
+        self._generation = int(self._used[-1])
+        occupied = np.flatnonzero(self._keys.any(axis=1))
+        self._slots = {self._keys[slot].tobytes(): int(slot) for slot in occupied}
+
+    def _find(self, digest: bytes) -> Optional[int]:
+        """Row holding digest, checked against the stored key (another process may have reused it)"""
+        slot = self._slots.get(digest)
+        if slot is not None and self._keys[slot].tobytes() == digest:
+            return slot
+        return None
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Return cached vectors for whichever keys are present"""
+        found = {}
+        with self._lock:
+            if self._vectors is None:
+                # Another process may have created the cache since
+                self._load_index()
+            if self._vectors is None:
+                self.misses += len(keys)
+                return found
+            digests = [bytes.fromhex(key) for key in keys]
+            slots = [self._find(digest) for digest in digests]
+            if any(slot is None for slot in slots) and int(self._used[-1]) != self._generation:
+                # Other processes may have added them since we last looked
+                self._rebuild_slots()
+                slots = [self._find(digest) for digest in digests]
+
+            now = time.time_ns()
+            for key, digest, slot in zip(keys, digests, slots):
+                vector = self._vectors[slot].tolist() if slot is not None else None
+                # Reads take no file lock: make sure no other process reused the row meanwhile
+                if vector is None or self._keys[slot].tobytes() != digest:
+                    self.misses += 1
+                    continue
+                self._used[slot] = now
+                self.hits += 1
+                found[key] = vector
+        return found
+
+    def get(self, key: str) -> Optional[List[float]]:
+        """Return the cached vector for key, or None"""
+        return self.get_many([key]).get(key)
+
+    def put_many(self, vectors: Dict[str, List[float]]):
+        """Store vectors by key, evicting the least recently used entries when full"""
+        if not vectors:
+            return
+        if len(vectors) > self.max_entries:
+            vectors = dict(list(vectors.items())[-self.max_entries:])
+        with self._lock:
+            dim = len(next(iter(vectors.values())))
+            if self._dim != dim:
+                self._open(dim)
+
+            with self._file_lock():
+                # Free rows first, then rows in least recently used order
+                free = np.flatnonzero(~self._keys.any(axis=1)).tolist()
+                if len(free) < len(vectors):
+                    taken = set(free)
+                    free += [int(slot) for slot in np.argsort(self._used[:-1]) if int(slot) not in taken]
+                candidates = iter(free)
+                written = set()
+                now = time.time_ns()
+                for key, vector in vectors.items():
+                    digest = bytes.fromhex(key)
+                    slot = self._find(digest)
+                    if slot is None:
+                        slot = next(candidate for candidate in candidates if candidate not in written)
+                        self._slots.pop(self._keys[slot].tobytes(), None)
+                    written.add(slot)
+                    # Clear the key while the row is rewritten so concurrent readers miss instead
+                    self._keys[slot] = 0
+                    self._vectors[slot] = vector
+                    self._keys[slot] = np.frombuffer(digest, dtype=np.uint8)
+                    self._used[slot] = now
+                    self._slots[digest] = slot
+                self._used[-1] += 1
+
+            self._dirty += len(vectors)
+            should_flush = self._dirty >= self.flush_every
+
+        if should_flush:
+            self.flush()
+
+    def put(self, key: str, vector: List[float]):
+        """Store a vector, evicting the least recently used entry when full"""
+        self.put_many({key: vector})
+
+    def flush(self):
+        """Write the memory-mapped files to disk"""
+        with self._lock:
+            if self._vectors is None or not self._dirty:
+                return
+            self._vectors.flush()
+            self._keys.flush()
+            self._used.flush()
+            self._dirty = 0
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and current occupancy"""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._slots),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+# Singleton instance (None when caching is disabled)
+embedding_cache = (
+    EmbeddingCache(Config.EMBEDDING_CACHE_DIR, Config.EMBEDDING_CACHE_MAX_ENTRIES)
+    if Config.EMBEDDING_CACHE_ENABLED else None
+)
@@ -0,0 +1,108 @@
+import logging
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+import numpy as np
+
+from backend.config import Config
+from backend.services.embedding_cache import embedding_cache
+from backend.services.telemetry import log_event
+from backend.services.vector_postprocess import vector_postprocessor
+
+# Per-process embedder, created once by the pool initializer
+_worker_embedder = None
+
+def _init_worker(threads: int):
+    """Load the model once per worker and pin its thread count"""
+    global _worker_embedder
+    import torch
+    from backend.services.biobert_embedder import BioBERTEmbedder
+
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(1)
+    # The parent process owns the cache; workers only run the model
+    _worker_embedder = BioBERTEmbedder(use_cache=False, verbose=False)
+
+def _embed_shard(texts: List[str]) -> List[List[float]]:
+    # Raw vectors: the parent caches them before post-processing
+    return _worker_embedder.get_batch_embeddings(texts, postprocess=False)
+
+class EmbeddingWorkerPool:
+    """Process pool that shards embedding work across CPU cores.
+
+    Each worker holds its own copy of the model and uses
+    ``threads_per_worker`` intra-op threads, so N workers together use the
+    whole machine instead of one oversubscribed PyTorch process.
+    """
+
+    def __init__(self, workers: int, threads_per_worker: Optional[int] = None,
+                 shards_per_worker: int = 4):
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+        self.shards_per_worker = shards_per_worker
+        self.cache = embedding_cache
+        self.model_id = self._model_id()
+
+        # spawn, not fork: forking a process that already started torch threads can deadlock
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.threads_per_worker,)
+        )
+
+    @staticmethod
+    def _model_id() -> str:
+        from backend.services.biobert_embedder import BioBERTEmbedder
+        return BioBERTEmbedder.model_id_for(Config.EMBEDDING_BACKEND)
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts across the pool, returning vectors in input order"""
+        start = time.perf_counter()
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
+
+        keys = []
+        if self.cache is not None:
+            keys = [self.cache.make_key(self.model_id, text, Config.EMBEDDING_MAX_LENGTH) for text in texts]
+            cached = self.cache.get_many(keys)
+            for i, key in enumerate(keys):
+                embeddings[i] = cached.get(key)
+        pending = [i for i, embedding in enumerate(embeddings) if embedding is None]
+
+        if pending:
+            # Several small shards per worker keep the load balanced when
+            # document lengths vary; map() yields results in submission order
+            shard_size = max(1, math.ceil(len(pending) / (self.workers * self.shards_per_worker)))
+            shards = [pending[i:i + shard_size] for i in range(0, len(pending), shard_size)]
+            results = self.executor.map(_embed_shard, [[texts[i] for i in shard] for shard in shards])
+
+            for shard, vectors in zip(shards, results):
+                for i, vector in zip(shard, vectors):
+                    embeddings[i] = vector
+
+            if self.cache is not None:
+                self.cache.put_many({keys[i]: embeddings[i] for i in pending})
+                self.cache.flush()
+
+        elapsed = time.perf_counter() - start
+        log_event("embed.pool", level=logging.INFO, documents=len(texts), seconds=round(elapsed, 2),
+                  docs_per_second=round(len(texts) / elapsed, 1) if elapsed > 0 else 0.0,
+                  workers=self.workers, threads_per_worker=self.threads_per_worker,
+                  cache_hits=len(texts) - len(pending))
+
+        if vector_postprocessor.is_identity:
+            return embeddings
+        return vector_postprocessor.apply(np.asarray(embeddings, dtype=np.float32)).tolist()
+
+    def close(self):
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
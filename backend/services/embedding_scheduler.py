@@ -0,0 +1,108 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List
+
+from backend.config import Config
+from backend.services.biobert_embedder import biobert_embedder
+from backend.services.telemetry import observe_embedding_batch, track_embedding_queue
+
+class EmbeddingScheduler:
+    """Dynamic micro-batching for query embeddings.
+
+    Concurrent callers enqueue their text and block on a future. A single
+    background thread collects requests for up to ``window_ms`` (or until
+    ``max_batch_size`` are waiting), runs them as one padded forward pass
+    and hands every caller its own vector. Queue depth, batch sizes and
+    queue wait are exported on /metrics.
+    """
+
+    def __init__(self, embedder, window_ms: float, max_batch_size: int):
+        self.embedder = embedder
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+        self.requests = 0
+        self.batches = 0
+        self.max_batch_seen = 0
+        self.batch_size_counts: Dict[int, int] = {}
+        track_embedding_queue(self._queue.qsize)
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="embedding-scheduler", daemon=True)
+                    self._thread.start()
+
+    def embed(self, text: str) -> List[float]:
+        """Embed one text, sharing the forward pass with concurrent callers"""
+        return self.embed_many([text])[0]
+
+    def embed_many(self, texts: List[str]) -> List[List[float]]:
+        """Embed several texts (one retrieval's queries), batched with concurrent callers' texts"""
+        self._ensure_started()
+        futures: List[Future] = []
+        for text in texts:
+            future: Future = Future()
+            self._queue.put((text, future, time.perf_counter()))
+            futures.append(future)
+        return [future.result() for future in futures]
+
+    def _collect_batch(self) -> list:
+        """Block for the first request, then gather more until the window closes"""
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            started = time.perf_counter()
+            texts = [text for text, _, _ in batch]
+            try:
+                vectors = self.embedder.get_batch_embeddings(texts, use_cache=False)
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future, _), vector in zip(batch, vectors):
+                future.set_result(vector)
+            observe_embedding_batch([started - queued for _, _, queued in batch])
+
+            self.requests += len(batch)
+            self.batches += 1
+            self.max_batch_seen = max(self.max_batch_seen, len(batch))
+            self.batch_size_counts[len(batch)] = self.batch_size_counts.get(len(batch), 0) + 1
+
+    def stats(self) -> Dict:
+        """Queue depth and batch size metrics"""
+        return {
+            "queue_depth": self._queue.qsize(),
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch_size": self.requests / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_batch_seen,
+            "batch_size_counts": dict(sorted(self.batch_size_counts.items()))
+        }
+
+# Singleton instance
+embedding_scheduler = EmbeddingScheduler(
+    biobert_embedder,
+    window_ms=Config.EMBEDDING_SCHEDULER_WINDOW_MS,
+    max_batch_size=Config.EMBEDDING_SCHEDULER_MAX_BATCH
+)
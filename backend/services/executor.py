@@ -0,0 +1,29 @@
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from backend.config import Config
+
+class BlockingExecutor:
+    """Runs blocking work (embedding, vector search, ingestion) for async routes.
+
+    A fixed pool of threads keeps the event loop free while bounding how many
+    BioBERT forward passes and store requests run at once; callers beyond
+    that wait in the pool's queue. The caller's context (trace ID, route) is
+    carried into the thread so logs and stage metrics stay attributed.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="blocking")
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Await fn(*args, **kwargs) on the pool"""
+        context = contextvars.copy_context()
+        call = functools.partial(context.run, fn, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(self._pool, call)
+
+# Singleton instance
+blocking_executor = BlockingExecutor(Config.BLOCKING_EXECUTOR_WORKERS)
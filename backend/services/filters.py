@@ -0,0 +1,24 @@
+from typing import Dict, Optional, Tuple
+
+# Properties searches can be filtered on
+FILTERABLE_PROPERTIES = ("type", "category")
+
+def normalize_filter(where: Optional[Dict]) -> Optional[Tuple]:
+    """Turn {"type": "exercise", "category": ["knee", "hip"]} into a hashable, sorted key.
+
+    Each property matches if its value is one of the given values; all
+    properties must match. An empty filter is None.
+    """
+    if not where:
+        return None
+    unknown = set(where) - set(FILTERABLE_PROPERTIES)
+    if unknown:
+        raise ValueError(f"Cannot filter on {sorted(unknown)}, expected any of {list(FILTERABLE_PROPERTIES)}")
+    return tuple(sorted(
+        (key, tuple(sorted(values)) if isinstance(values, (list, tuple, set)) else (values,))
+        for key, values in where.items()
+    ))
+
+def matches_filter(properties: Dict, key: Optional[Tuple]) -> bool:
+    """True if an object's properties satisfy a normalized filter"""
+    return key is None or all(properties.get(prop) in values for prop, values in key)
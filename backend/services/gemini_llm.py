@@ -1,25 +1,46 @@
+from typing import AsyncIterator, Iterator
 import google.generativeai as genai
 from backend.config import Config
+from backend.services.llm import LLMBackend
+from backend.services.telemetry import stage
 
-class GeminiLLM:
+class GeminiLLM(LLMBackend):
     def __init__(self):
         genai.configure(api_key=Config.GEMINI_API_KEY)
         self.model = genai.GenerativeModel('gemini-2.5-flash')
-    
+
     def generate(self, prompt: str) -> str:
         """Generate response from Gemini"""
-        response = self.model.generate_content(prompt)
+        with stage("llm_generate"):
+            response = self.model.generate_content(prompt)
         return response.text
-    
-    def chat_generate(self, messages: list) -> str:
-        """Generate response based on chat history"""
-        # Format messages into a prompt
-        formatted_prompt = "\n".join([
-            f"{msg['role']}: {msg['content']}" for msg in messages
-        ])
-        
-        response = self.model.generate_content(formatted_prompt)
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        """Yield Gemini's response chunks as they arrive"""
+        with stage("llm_generate"):
+            response = self.model.generate_content(prompt, stream=True)
+            for chunk in response:
+                try:
+                    text = chunk.text
+                except ValueError:
+                    # Chunks without text parts, e.g. the final one carrying only safety ratings
+                    continue
+                if text:
+                    yield text
+
+    async def generate_async(self, prompt: str) -> str:
+        """generate on Gemini's async client, without tying up a thread"""
+        with stage("llm_generate"):
+            response = await self.model.generate_content_async(prompt)
         return response.text
 
-# Singleton instance
-gemini_llm = GeminiLLM()
\ No newline at end of file
+    async def stream_async(self, prompt: str) -> AsyncIterator[str]:
+        with stage("llm_generate"):
+            response = await self.model.generate_content_async(prompt, stream=True)
+            async for chunk in response:
+                try:
+                    text = chunk.text
+                except ValueError:
+                    continue
+                if text:
+                    yield text
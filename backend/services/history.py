@@ -0,0 +1,62 @@
+from typing import Dict, List, Optional, Tuple
+
+from backend.config import Config
+from backend.prompts.compaction_prompt import get_compaction_prompt
+
+def format_messages(messages: List) -> str:
+    """Messages as 'Role: content' lines, the transcript format of every prompt"""
+    return "\n".join(f"{msg.role.capitalize()}: {msg.content}" for msg in messages)
+
+class HistoryCompactor:
+    """Keeps intake prompts roughly constant in size as a conversation grows.
+
+    The last ``recent_messages`` messages are rendered verbatim. Older ones
+    are either left out, when their facts are already tracked elsewhere (the
+    intake state), or replaced by a running summary. The summary is stored
+    with the chat as {"text": ..., "messages": number of messages it covers}
+    and extended with the next ``summary_batch`` older messages at a time,
+    so it is rewritten once per batch rather than every turn. Older messages
+    it does not cover yet are still rendered verbatim. The summary header
+    says how many patient messages it stands for, so the model (and the
+    stub) can still tell how far the intake has got.
+    """
+
+    def __init__(self, recent_messages: int, summary_batch: int):
+        self.recent_messages = recent_messages
+        self.summary_batch = summary_batch
+
+    def older_count(self, messages: List) -> int:
+        """Number of messages before the verbatim tail"""
+        return max(len(messages) - self.recent_messages, 0)
+
+    def render(self, messages: List, summary: Optional[Dict] = None, facts_tracked: bool = False) -> str:
+        """Transcript for a prompt: summary (or omission note), then the remaining messages verbatim"""
+        older = self.older_count(messages)
+        if facts_tracked:
+            if not older:
+                return format_messages(messages)
+            note = f"({older} earlier messages omitted; what the patient told us is in the intake state)"
+            return note + "\n" + format_messages(messages[older:])
+
+        covered = min(summary["messages"], older) if summary and summary.get("text") else 0
+        if not covered:
+            return format_messages(messages)
+        patient_messages = sum(1 for msg in messages[:covered] if msg.role == "user")
+        return (f"Summary of the earlier conversation ({patient_messages} patient messages):\n{summary['text']}\n\n"
+                + format_messages(messages[covered:]))
+
+    def compaction(self, messages: List, summary: Optional[Dict]) -> Optional[Tuple[str, int]]:
+        """(prompt folding the next batch of older messages into the summary, number of
+        messages the new summary covers), or None until a full batch is waiting"""
+        covered = summary["messages"] if summary else 0
+        older = self.older_count(messages)
+        if older - covered < self.summary_batch:
+            return None
+        previous = summary["text"] if summary else ""
+        return get_compaction_prompt(previous, format_messages(messages[covered:older])), older
+
+# Singleton instance (None when disabled)
+history_compactor = HistoryCompactor(
+    recent_messages=Config.HISTORY_RECENT_MESSAGES,
+    summary_batch=Config.HISTORY_SUMMARY_BATCH
+) if Config.HISTORY_COMPACTION_ENABLED else None
@@ -0,0 +1,57 @@
+import json
+from typing import Dict, List, Optional, Tuple
+
+from backend.prompts.intake_prompt import INTAKE_FIELDS
+
+FIELD_NAMES = [key for key, _ in INTAKE_FIELDS]
+
+# Text the model may put between the JSON object and the reply
+SEPARATOR_CHARS = " \t\r\n`-"
+
+_decoder = json.JSONDecoder()
+
+def empty_state() -> Dict[str, Optional[str]]:
+    return {key: None for key in FIELD_NAMES}
+
+def load_state(stored: Optional[Dict]) -> Dict[str, Optional[str]]:
+    """Intake state from a chat document (chats started before it existed have none)"""
+    state = empty_state()
+    if stored:
+        state.update({key: value for key, value in stored.items() if key in state})
+    return state
+
+def missing_fields(state: Dict[str, Optional[str]]) -> List[str]:
+    return [key for key in FIELD_NAMES if not state.get(key)]
+
+def is_complete(state: Dict[str, Optional[str]]) -> bool:
+    return not missing_fields(state)
+
+def apply_updates(state: Dict[str, Optional[str]], updates: Dict) -> Dict[str, Optional[str]]:
+    """New state with the known fields the model extracted; unknown keys and empty values are ignored"""
+    state = dict(state)
+    for key, value in updates.items():
+        if key in state and value not in (None, ""):
+            state[key] = str(value).strip()
+    return state
+
+def parse_intake_reply(text: str) -> Optional[Tuple[Dict, str]]:
+    """(field updates, reply to the patient) from '<JSON object> --- <reply>'.
+
+    Tolerates code fences and text around the separator. Returns None while
+    the JSON object is incomplete, or if there is none.
+    """
+    start = text.find("{")
+    if start == -1:
+        return None
+    try:
+        updates, end = _decoder.raw_decode(text, start)
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(updates, dict):
+        updates = {}
+    return updates, text[end:].lstrip(SEPARATOR_CHARS).rstrip(" \t\r\n`")
+
+def may_contain_json(text: str) -> bool:
+    """False once the start of a reply shows it is plain text rather than '<JSON object> ...'"""
+    stripped = text.lstrip()
+    return not stripped or stripped[0] in "{`"
@@ -0,0 +1,38 @@
+import os
+import uuid
+
+from backend.config import Config
+
+class KnowledgeBaseVersion:
+    """Version stamp of the knowledge base, shared by every process through a small file.
+
+    Uploads and ``ingest_data.py`` call ``bump`` after adding documents;
+    per-process caches of anything derived from the knowledge base compare
+    ``current`` against the version they were filled under. Point
+    ``KNOWLEDGE_BASE_VERSION_FILE`` at shared storage when workers run on
+    several machines.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def current(self) -> str:
+        """The current version, "" if the knowledge base was never changed through us"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return f.read().strip()
+        except OSError:
+            return ""
+
+    def bump(self) -> str:
+        """Mark the knowledge base as changed"""
+        version = uuid.uuid4().hex
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{version}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(version)
+        os.replace(tmp_path, self.path)
+        return version
+
+# Singleton instance
+knowledge_base_version = KnowledgeBaseVersion(Config.KNOWLEDGE_BASE_VERSION_FILE)
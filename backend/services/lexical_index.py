@@ -0,0 +1,262 @@
+import gzip
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from backend.config import Config
+from backend.services.file_lock import file_lock
+from backend.services.filters import matches_filter, normalize_filter
+from backend.services.registry import registry
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Only the most frequent function words; clinical terms are never dropped
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have i in is it its my of on or so that the
+this to was were will with you your
+""".split())
+
+# Metadata kept for each indexed object, matching vector store hits
+DOC_FIELDS = ["content", "type", "category", "parent_id", "chunk_index"]
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+class BM25Index:
+    """Compact inverted index with BM25 scoring, shared by every process through its files.
+
+    Each term maps to two parallel arrays (document ids and term
+    frequencies) over the ``content`` and ``category`` fields of every
+    stored object. Hits use the vector stores' format, with the BM25 score
+    in ``_additional.score``.
+
+    On disk the index is a gzipped JSON snapshot (``path``) plus an
+    append-only log of objects added since (``path.log``, one JSON line
+    each), so an upload appends its objects instead of rewriting the
+    index. Writers hold an exclusive lock on ``path.lock``; before every
+    search and add the index checks both files and reads what other
+    processes (the server's workers, ``ingest_data.py``) wrote since. Once
+    the log holds ``compact_every`` objects it is folded into a new
+    snapshot.
+    """
+
+    def __init__(self, path: str, k1: float = 1.2, b: float = 0.75, compact_every: int = 10000):
+        self.path = path
+        self.log_path = path + ".log"
+        self.lock_path = path + ".lock"
+        self.k1 = k1
+        self.b = b
+        self.compact_every = compact_every
+        self._lock = threading.Lock()
+
+        self._reset()
+        self._snapshot_stamp = None  # (inode, mtime, size) of the snapshot we loaded
+        with self._lock:
+            self._refresh()
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def _reset(self):
+        self.docs: List[Dict] = []
+        self.doc_lengths: List[int] = []
+        self._postings: Dict[str, tuple] = {}  # term -> (doc ids, term frequencies) as arrays
+        self._masks: Dict[tuple, np.ndarray] = {}  # normalized filter -> matching docs
+        self._log_offset = 0  # bytes of the log already indexed
+        self._log_docs = 0
+
+    @staticmethod
+    def _stamp(path: str) -> Optional[tuple]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def _log_size(self) -> int:
+        try:
+            return os.path.getsize(self.log_path)
+        except OSError:
+            return 0
+
+    def _refresh(self):
+        """Pick up what other processes wrote since we last looked (caller holds self._lock)"""
+        if self._stamp(self.path) == self._snapshot_stamp and self._log_size() == self._log_offset:
+            return
+        # Compaction replaces the snapshot and truncates the log under the file lock; read a consistent pair
+        with file_lock(self.lock_path):
+            self._refresh_locked()
+
+    def _refresh_locked(self):
+        stamp = self._stamp(self.path)
+        if stamp != self._snapshot_stamp or self._log_size() < self._log_offset:
+            self._reset()
+            if stamp is not None:
+                self._load()
+            self._snapshot_stamp = stamp
+        self._read_log()
+
+    def _load(self):
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        self.docs = data["docs"]
+        self.doc_lengths = data["doc_lengths"]
+        self._postings = {
+            term: (np.array(ids, dtype=np.int32), np.array(tfs, dtype=np.float32))
+            for term, (ids, tfs) in data["postings"].items()
+        }
+
+    def _read_log(self):
+        """Index the log's objects past what we already have"""
+        if not os.path.exists(self.log_path):
+            return
+        with open(self.log_path, "rb") as f:
+            f.seek(self._log_offset)
+            appended = f.read()
+        if not appended:
+            return
+        self._index([json.loads(line) for line in appended.splitlines() if line.strip()])
+        self._log_offset += len(appended)
+        self._log_docs += appended.count(b"\n")
+
+    def _merge(self, pending: Dict[str, List[List[int]]]):
+        """Append new postings (term -> [[doc ids], [tfs]]) to the array form"""
+        for term, (ids, tfs) in pending.items():
+            if term in self._postings:
+                old_ids, old_tfs = self._postings[term]
+                self._postings[term] = (np.concatenate([old_ids, np.array(ids, dtype=np.int32)]),
+                                        np.concatenate([old_tfs, np.array(tfs, dtype=np.float32)]))
+            else:
+                self._postings[term] = (np.array(ids, dtype=np.int32), np.array(tfs, dtype=np.float32))
+
+    def _index(self, docs: List[Dict]):
+        pending = {}
+        for doc in docs:
+            doc_id = len(self.docs)
+            terms = Counter(tokenize(doc.get("content") or "") + tokenize(doc.get("category") or ""))
+            self.docs.append(doc)
+            self.doc_lengths.append(sum(terms.values()))
+            for term, tf in terms.items():
+                ids, tfs = pending.setdefault(term, [[], []])
+                ids.append(doc_id)
+                tfs.append(tf)
+        self._merge(pending)
+        self._masks = {}
+
+    def add(self, objects: List[Dict]):
+        """Index objects (chunks), appending them to the shared log"""
+        if not objects:
+            return
+        docs = [{field: obj.get(field) for field in DOC_FIELDS} for obj in objects]
+        with self._lock, file_lock(self.lock_path):
+            self._refresh_locked()
+            with open(self.log_path, "ab") as f:
+                f.write("".join(json.dumps(doc, separators=(",", ":")) + "\n" for doc in docs).encode("utf-8"))
+            # Index them (and anything appended before them) in log order, like every other process
+            self._read_log()
+            if self._log_docs >= self.compact_every:
+                self._compact()
+
+    def save(self):
+        """Fold the log into a new snapshot"""
+        with self._lock, file_lock(self.lock_path):
+            self._refresh_locked()
+            self._compact()
+
+    def _compact(self):
+        """Write a snapshot of everything and empty the log (caller holds both locks)"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        data = {
+            "docs": self.docs,
+            "doc_lengths": self.doc_lengths,
+            "postings": {term: [ids.tolist(), tfs.astype(int).tolist()] for term, (ids, tfs) in self._postings.items()}
+        }
+        tmp_path = self.path + ".tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+        with open(self.log_path, "wb"):
+            pass
+        self._snapshot_stamp = self._stamp(self.path)
+        self._log_offset = 0
+        self._log_docs = 0
+
+    def _mask(self, key: tuple) -> np.ndarray:
+        mask = self._masks.get(key)
+        if mask is None:
+            mask = np.array([matches_filter(doc, key) for doc in self.docs], dtype=bool)
+            self._masks[key] = mask
+        return mask
+
+    def search(self, query: str, limit: int = 5, where: Optional[Dict] = None) -> List[Dict]:
+        """BM25 top-k for one query, optionally restricted to a type/category"""
+        with self._lock:
+            self._refresh()
+            return self._search(query, limit, normalize_filter(where))
+
+    def _search(self, query: str, limit: int, key: Optional[tuple]) -> List[Dict]:
+        count = len(self.docs)
+        terms = set(tokenize(query))
+        if not count or not terms or limit <= 0:
+            return []
+
+        lengths = np.asarray(self.doc_lengths, dtype=np.float32)
+        length_norm = self.k1 * (1 - self.b + self.b * lengths / max(float(lengths.mean()), 1.0))
+
+        scores = np.zeros(count, dtype=np.float32)
+        for term in terms:
+            posting = self._postings.get(term)
+            if posting is None:
+                continue
+            ids, tfs = posting
+            idf = math.log(1 + (count - len(ids) + 0.5) / (len(ids) + 0.5))
+            # A term occurs once per document in its posting list, so plain fancy-index += is safe
+            scores[ids] += idf * tfs * (self.k1 + 1) / (tfs + length_norm[ids])
+        if key is not None:
+            scores[~self._mask(key)] = 0
+
+        matched = np.flatnonzero(scores)
+        if not len(matched):
+            return []
+        top = matched[np.argsort(-scores[matched])[:limit]]
+        return [dict(self.docs[i], _additional={"score": float(scores[i])}) for i in top]
+
+    def search_many(self, queries: List[str], limit: int = 5, filters: Optional[List[Optional[Dict]]] = None,
+                    limits: Optional[List[int]] = None) -> List[List[Dict]]:
+        with self._lock:
+            self._refresh()
+            return [
+                self._search(query, limits[i] if limits is not None else limit,
+                             normalize_filter(filters[i]) if filters is not None else None)
+                for i, query in enumerate(queries)
+            ]
+
+# Singleton instance (loaded on first use or during app warmup)
+lexical_index = registry.register("lexical_index", lambda: BM25Index(Config.LEXICAL_INDEX_PATH))
+
+if __name__ == "__main__":
+    import argparse
+    from backend.services.vector_store import VectorStore
+    from ingest_data import load_documents
+
+    parser = argparse.ArgumentParser(description="Rebuild the BM25 index from ingest files, without re-embedding")
+    parser.add_argument("files", nargs="+", help="JSON files in the format ingest_data.py accepts")
+    args = parser.parse_args()
+
+    for stale in (Config.LEXICAL_INDEX_PATH, Config.LEXICAL_INDEX_PATH + ".log"):
+        if os.path.exists(stale):
+            os.remove(stale)
+    index = BM25Index(Config.LEXICAL_INDEX_PATH)
+    for path in args.files:
+        # Same chunking as ingestion, so hits line up with vector store objects
+        index.add(VectorStore()._prepare_objects(load_documents(path)))
+    index.save()
+    print(f"Indexed {len(index)} objects into {Config.LEXICAL_INDEX_PATH}")
@@ -0,0 +1,64 @@
+import asyncio
+import contextvars
+from typing import AsyncIterator, Dict, Iterator, List
+from backend.config import Config
+from backend.services.registry import registry
+
+class LLMBackend:
+    """Text generation used by the chat, summary and /ask paths.
+
+    Backends implement ``generate`` (prompt in, completion out) and, if
+    the model can stream, ``stream``; ``chat_generate`` renders a message
+    list into a prompt for them. Async routes use ``generate_async`` and
+    ``stream_async``, which backends with a native async client override;
+    the defaults run the blocking calls on a worker thread.
+    """
+
+    def generate(self, prompt: str) -> str:
+        raise NotImplementedError
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        """Yield the completion in chunks as it is produced (here: all at once)"""
+        yield self.generate(prompt)
+
+    async def generate_async(self, prompt: str) -> str:
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(None, context.run, self.generate, prompt)
+
+    async def stream_async(self, prompt: str) -> AsyncIterator[str]:
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        chunks = self.stream(prompt)
+        end = object()
+        try:
+            while True:
+                chunk = await loop.run_in_executor(None, context.run, next, chunks, end)
+                if chunk is end:
+                    return
+                yield chunk
+        finally:
+            chunks.close()
+
+    def chat_generate(self, messages: List[Dict]) -> str:
+        """Generate response based on chat history"""
+        formatted_prompt = "\n".join([
+            f"{msg['role']}: {msg['content']}" for msg in messages
+        ])
+        return self.generate(formatted_prompt)
+
+def _build_llm() -> LLMBackend:
+    """Pick the backend configured by LLM_BACKEND"""
+    if Config.LLM_BACKEND == "gemini":
+        from backend.services.gemini_llm import GeminiLLM
+        return GeminiLLM()
+    if Config.LLM_BACKEND == "stub":
+        from backend.services.stub_llm import StubLLM
+        return StubLLM(
+            latency_ms=Config.STUB_LLM_LATENCY_MS,
+            tokens_per_second=Config.STUB_LLM_TOKENS_PER_SECOND,
+            intake_turns=Config.STUB_LLM_INTAKE_TURNS
+        )
+    raise ValueError(f"Unknown LLM_BACKEND '{Config.LLM_BACKEND}', expected 'gemini' or 'stub'")
+
+# Singleton instance (built on first use or during app warmup)
+llm = registry.register("llm", _build_llm)
@@ -0,0 +1,318 @@
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from backend.config import Config
+from backend.services.file_lock import file_lock
+from backend.services.filters import matches_filter, normalize_filter
+from backend.services.vector_store import RESULT_PROPERTIES, VectorStore
+
+try:
+    import hnswlib
+except ImportError:  # optional dependency, only needed for LOCAL_STORE_INDEX=hnsw
+    hnswlib = None
+
+class LocalVectorStore(VectorStore):
+    """In-process vector store backed by a memory-mapped matrix.
+
+    Layout of ``store_dir``:
+      - ``vectors.npy``: (capacity, dim) matrix of unit-length vectors, memory-mapped
+      - ``metadata.jsonl``: one JSON object per stored row (the sidecar)
+      - ``hnsw.bin``: the optional HNSW graph
+
+    Search is exact cosine top-k with one matrix-vector product, or
+    approximate through hnswlib when ``index="hnsw"``. Filtered searches
+    are always exact, over the rows of the matching type/category
+    partition. Hits use Weaviate's format, including
+    ``_additional.distance`` (1 - cosine similarity).
+
+    Writes hold ``_lock``; searches only take it to snapshot the matrix,
+    row count and indexes, so a concurrent write (or growth of the matrix)
+    never changes what a running search reads.
+
+    Several processes (the server's workers, ``ingest_data.py``) can share
+    one directory: writers also hold an exclusive lock on ``store.lock``,
+    and every search and write first picks up rows other processes
+    appended (new metadata lines) and a matrix they grew (a new
+    ``vectors.npy`` file).
+    """
+
+    VECTORS_FILE = "vectors.npy"
+    METADATA_FILE = "metadata.jsonl"
+    HNSW_FILE = "hnsw.bin"
+    LOCK_FILE = "store.lock"
+
+    def __init__(self, store_dir: str, index: str = "exact", dtype: Optional[str] = None):
+        if index not in ("exact", "hnsw"):
+            raise ValueError(f"Unknown LOCAL_STORE_INDEX '{index}', expected 'exact' or 'hnsw'")
+        if index == "hnsw" and hnswlib is None:
+            raise ImportError("LOCAL_STORE_INDEX=hnsw requires the 'hnswlib' package")
+
+        self.store_dir = store_dir
+        self.index_type = index
+        self.dtype = np.dtype(dtype or Config.EMBEDDING_DTYPE)
+        self._lock = threading.Lock()
+
+        self._vectors: Optional[np.ndarray] = None
+        self._metadata: List[Dict] = []
+        self._hnsw = None
+        self._partitions: Dict[tuple, np.ndarray] = {}  # normalized filter -> matching rows
+        self._vectors_inode: Optional[int] = None  # vectors.npy file we have mapped
+        self._metadata_offset = 0  # bytes of metadata.jsonl already read
+
+        os.makedirs(store_dir, exist_ok=True)
+        with self._lock:
+            self._refresh()
+
+    @property
+    def _vectors_path(self) -> str:
+        return os.path.join(self.store_dir, self.VECTORS_FILE)
+
+    @property
+    def _metadata_path(self) -> str:
+        return os.path.join(self.store_dir, self.METADATA_FILE)
+
+    @property
+    def _hnsw_path(self) -> str:
+        return os.path.join(self.store_dir, self.HNSW_FILE)
+
+    @property
+    def _lock_path(self) -> str:
+        return os.path.join(self.store_dir, self.LOCK_FILE)
+
+    @property
+    def count(self) -> int:
+        return len(self._metadata)
+
+    @property
+    def dim(self) -> Optional[int]:
+        return None if self._vectors is None else self._vectors.shape[1]
+
+    def _vectors_file_inode(self) -> Optional[int]:
+        try:
+            return os.stat(self._vectors_path).st_ino
+        except OSError:
+            return None
+
+    def _metadata_size(self) -> int:
+        try:
+            return os.path.getsize(self._metadata_path)
+        except OSError:
+            return 0
+
+    def _refresh(self):
+        """Pick up rows and growth from other processes since we last looked (caller holds _lock)"""
+        if self._vectors_file_inode() == self._vectors_inode and self._metadata_size() == self._metadata_offset:
+            return
+        with file_lock(self._lock_path):
+            self._refresh_locked()
+
+    def _refresh_locked(self):
+        """Open the current matrix and read new metadata lines; the metadata decides how many rows are valid"""
+        inode = self._vectors_file_inode()
+        if inode != self._vectors_inode:
+            vectors = np.load(self._vectors_path, mmap_mode="r+") if inode is not None else None
+            if vectors is not None and vectors.dtype != self.dtype:
+                raise ValueError(f"Local store at {self.store_dir} holds {vectors.dtype} vectors, "
+                                 f"but EMBEDDING_DTYPE is {self.dtype.name}; re-ingest into a new directory")
+            self._vectors = vectors
+            self._vectors_inode = inode
+
+        if self._metadata_size() <= self._metadata_offset:
+            return
+        with open(self._metadata_path, "rb") as f:
+            f.seek(self._metadata_offset)
+            appended = f.read()
+        # Only complete lines: a writer that died mid-line never committed that row
+        appended = appended[:appended.rfind(b"\n") + 1]
+        if not appended:
+            return
+        rows = [json.loads(line) for line in appended.splitlines() if line.strip()]
+        # Vectors are flushed before their metadata line is written, so these rows are within the matrix
+        self._metadata = self._metadata + rows
+        self._metadata_offset += len(appended)
+        self._partitions = {}
+
+        if self.index_type == "hnsw":
+            self._load_hnsw()
+
+    def _ensure_capacity(self, dim: int, needed: int):
+        """Grow the memory-mapped matrix (doubling) so it holds at least `needed` rows"""
+        if self._vectors is not None and self._vectors.shape[1] != dim:
+            raise ValueError(f"Local store holds {self._vectors.shape[1]}-dim vectors, got {dim}-dim; "
+                             f"re-ingest into a new directory after changing the embedding pipeline")
+
+        capacity = 0 if self._vectors is None else self._vectors.shape[0]
+        if needed <= capacity:
+            return
+
+        new_capacity = max(needed, capacity * 2, 1024)
+        grown = np.lib.format.open_memmap(self._vectors_path + ".tmp", mode="w+",
+                                          dtype=self.dtype, shape=(new_capacity, dim))
+        if capacity:
+            grown[:self.count] = self._vectors[:self.count]
+        grown.flush()
+        # Swap in the complete matrix; searches still holding the old one keep their mapping,
+        # other processes reopen the new file on their next refresh
+        self._vectors = grown
+        os.replace(self._vectors_path + ".tmp", self._vectors_path)
+        self._vectors_inode = self._vectors_file_inode()
+
+    def _write_objects(self, objects: List[Dict], embeddings: List[List[float]]):
+        """Append objects and their (unit-normalized) vectors."""
+        if not objects:
+            return
+
+        vectors = np.array(embeddings, dtype=np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+        rows = [{key: obj.get(key) for key in RESULT_PROPERTIES} for obj in objects]
+        with self._lock, file_lock(self._lock_path):
+            # Append after every row other processes wrote
+            self._refresh_locked()
+            start = self.count
+            self._ensure_capacity(vectors.shape[1], start + len(vectors))
+            self._vectors[start:start + len(vectors)] = vectors.astype(self.dtype)
+            self._vectors.flush()
+
+            # Metadata last: a row only becomes visible once its vector is on disk
+            lines = "".join(json.dumps(row) + "\n" for row in rows).encode("utf-8")
+            with open(self._metadata_path, "ab") as f:
+                # Drop a partial line left by a writer that died mid-write
+                f.truncate(self._metadata_offset)
+                f.write(lines)
+            self._metadata = self._metadata + rows
+            self._metadata_offset += len(lines)
+            self._partitions = {}
+
+            if self.index_type == "hnsw":
+                self._add_to_hnsw(vectors, start)
+
+    def _load_hnsw(self):
+        self._hnsw = hnswlib.Index(space="cosine", dim=self.dim)
+        if os.path.exists(self._hnsw_path):
+            self._hnsw.load_index(self._hnsw_path, max_elements=max(self.count, 1))
+            if self._hnsw.get_current_count() == self.count:
+                self._hnsw.set_ef(Config.LOCAL_STORE_HNSW_EF)
+                return
+        # Missing or stale graph: rebuild it from the matrix
+        self._hnsw = hnswlib.Index(space="cosine", dim=self.dim)
+        self._hnsw.init_index(max_elements=max(self.count, 1024), ef_construction=200, M=16)
+        self._hnsw.add_items(np.asarray(self._vectors[:self.count], dtype=np.float32), np.arange(self.count))
+        self._hnsw.set_ef(Config.LOCAL_STORE_HNSW_EF)
+        self._hnsw.save_index(self._hnsw_path)
+
+    def _add_to_hnsw(self, vectors: np.ndarray, start: int):
+        if self._hnsw is None:
+            self._hnsw = hnswlib.Index(space="cosine", dim=vectors.shape[1])
+            self._hnsw.init_index(max_elements=max(len(vectors), 1024), ef_construction=200, M=16)
+            self._hnsw.set_ef(Config.LOCAL_STORE_HNSW_EF)
+        needed = start + len(vectors)
+        if needed > self._hnsw.get_max_elements():
+            self._hnsw.resize_index(max(needed, self._hnsw.get_max_elements() * 2))
+        self._hnsw.add_items(vectors, np.arange(start, needed))
+        self._hnsw.save_index(self._hnsw_path)
+
+    def _snapshot(self) -> Dict:
+        """Consistent view of the store for one search"""
+        with self._lock:
+            self._refresh()
+            return {
+                "vectors": self._vectors,
+                "count": self.count,
+                "metadata": self._metadata,
+                "partitions": self._partitions,
+                "hnsw": self._hnsw
+            }
+
+    @staticmethod
+    def _hit(view: Dict, row: int, distance: float, include_vector: bool = False) -> Dict:
+        hit = dict(view["metadata"][row])
+        hit["_additional"] = {"id": row, "distance": distance}
+        if include_vector:
+            hit["_additional"]["vector"] = view["vectors"][row].astype(np.float32).tolist()
+        return hit
+
+    def fetch_vectors(self, hits: List[Dict]) -> List[Optional[List[float]]]:
+        """Stored vectors of hits from this store (rows are never rewritten, so the ID is enough)"""
+        vectors = self._snapshot()["vectors"]
+        rows = [hit.get('_additional', {}).get('id') for hit in hits]
+        return [vectors[row].astype(np.float32).tolist() if isinstance(row, int) else None for row in rows]
+
+    def search_by_vector(self, vector: List[float], limit: int = 5) -> List[Dict]:
+        """Cosine nearest neighbours, exact by default or through HNSW."""
+        return self.search_many_by_vector([vector], limit)[0]
+
+    @staticmethod
+    def _partition_rows(view: Dict, key: tuple) -> np.ndarray:
+        """Rows matching a normalized filter, cached until the next write"""
+        rows = view["partitions"].get(key)
+        if rows is None:
+            rows = np.array([row for row, meta in enumerate(view["metadata"][:view["count"]]) if matches_filter(meta, key)],
+                            dtype=np.int64)
+            # A write replaces the dict, so this never caches rows for a newer store
+            view["partitions"][key] = rows
+        return rows
+
+    @staticmethod
+    def _exact_top_k(view: Dict, queries: np.ndarray, limit: int, rows: Optional[np.ndarray] = None):
+        """(rows, scores) of the top-k cosine matches per query, over all rows or the given ones"""
+        count = view["count"] if rows is None else len(rows)
+        limit = min(limit, count)
+        if limit <= 0:
+            return np.zeros((len(queries), 0), dtype=np.int64), np.zeros((len(queries), 0), dtype=np.float32)
+
+        matrix = view["vectors"][:count] if rows is None else view["vectors"][rows]
+        if matrix.dtype != np.float32:
+            # numpy has no BLAS path for float16, upcast for the product
+            matrix = matrix.astype(np.float32)
+        scores = queries @ matrix.T
+        if limit < count:
+            top = np.argpartition(-scores, limit - 1, axis=1)[:, :limit]
+        else:
+            top = np.tile(np.arange(count), (len(queries), 1))
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        return (top if rows is None else rows[top]), top_scores
+
+    def search_many_by_vector(self, vectors: List[List[float]], limit: int = 5, include_vectors: bool = False,
+                              filters: Optional[List[Optional[Dict]]] = None,
+                              limits: Optional[List[int]] = None) -> List[List[Dict]]:
+        """Top-k for a batch of queries with one matrix product per filter (or one HNSW batch query)."""
+        limits = list(limits) if limits is not None else [limit] * len(vectors)
+        view = self._snapshot()
+        if not view["count"] or not len(vectors):
+            return [[] for _ in vectors]
+
+        queries = np.array(vectors, dtype=np.float32)
+        queries /= np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+
+        # Queries sharing a filter are ranked together
+        groups: Dict[Optional[tuple], List[int]] = {}
+        for i in range(len(queries)):
+            key = normalize_filter(filters[i]) if filters is not None else None
+            groups.setdefault(key, []).append(i)
+
+        results: List[List[Dict]] = [[] for _ in vectors]
+        for key, members in groups.items():
+            k = max(limits[i] for i in members)
+            if k <= 0:
+                continue
+            if key is None and view["hnsw"] is not None:
+                # hnswlib cannot query while the graph is resized; queries are quick enough to serialize with writes
+                with self._lock:
+                    labels, distances = view["hnsw"].knn_query(queries[members], k=min(k, view["count"]))
+                ranked = [list(zip(row_labels, row_distances)) for row_labels, row_distances in zip(labels, distances)]
+            else:
+                rows, scores = self._exact_top_k(view, queries[members], k,
+                                                 None if key is None else self._partition_rows(view, key))
+                ranked = [list(zip(row_ids, 1.0 - row_scores)) for row_ids, row_scores in zip(rows, scores)]
+            for i, matches in zip(members, ranked):
+                results[i] = [self._hit(view, int(row), float(distance), include_vectors)
+                              for row, distance in matches[:limits[i]]]
+        return results
@@ -0,0 +1,125 @@
+import logging
+import os
+from typing import Dict
+
+import numpy as np
+
+from backend.config import Config
+from backend.services.telemetry import log_event
+
+try:
+    import onnxruntime as ort
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+except ImportError:  # optional dependency, only needed for EMBEDDING_BACKEND=onnx
+    ort = None
+
+ONNX_INPUT_NAMES = ["input_ids", "attention_mask", "token_type_ids"]
+
+def export_quantized_model(model_name: str, output_dir: str) -> str:
+    """Export the BioBERT encoder to ONNX and apply dynamic int8 quantization"""
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    os.makedirs(output_dir, exist_ok=True)
+    fp32_path = os.path.join(output_dir, "model.onnx")
+    int8_path = os.path.join(output_dir, "model.int8.onnx")
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name)
+    model.eval()
+
+    class _Encoder(torch.nn.Module):
+        """Pin the forward signature to the exported input names"""
+
+        def __init__(self, encoder):
+            super().__init__()
+            self.encoder = encoder
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            return self.encoder(input_ids=input_ids, attention_mask=attention_mask,
+                                token_type_ids=token_type_ids).last_hidden_state
+
+    sample = tokenizer(["dummy input for export"], return_tensors="pt")
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in ONNX_INPUT_NAMES}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    log_event("onnx.export", level=logging.INFO, model=model_name, path=fp32_path)
+    with torch.no_grad():
+        torch.onnx.export(
+            _Encoder(model),
+            (sample["input_ids"], sample["attention_mask"], sample["token_type_ids"]),
+            fp32_path,
+            input_names=ONNX_INPUT_NAMES,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+            dynamo=False
+        )
+
+    log_event("onnx.quantize", level=logging.INFO, path=int8_path)
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    return int8_path
+
+class OnnxEncoder:
+    """BioBERT encoder served through onnxruntime with int8 weights"""
+
+    def __init__(self, model_name: str, model_dir: str, num_threads: int = 0):
+        if ort is None:
+            raise ImportError("EMBEDDING_BACKEND=onnx requires the 'onnxruntime' and 'onnx' packages")
+
+        model_path = os.path.join(model_dir, "model.int8.onnx")
+        if not os.path.exists(model_path):
+            model_path = export_quantized_model(model_name, model_dir)
+
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def last_hidden_state(self, inputs: Dict[str, np.ndarray]) -> np.ndarray:
+        """Run the encoder and return the final hidden states"""
+        feed = {name: np.asarray(value, dtype=np.int64) for name, value in inputs.items()
+                if name in self.input_names}
+        if "token_type_ids" in self.input_names and "token_type_ids" not in feed:
+            feed["token_type_ids"] = np.zeros_like(feed["input_ids"])
+        return self.session.run(["last_hidden_state"], feed)[0]
+
+def cosine_parity(reference: np.ndarray, candidate: np.ndarray) -> Dict[str, float]:
+    """Row-wise cosine similarity between two sets of vectors"""
+    reference = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    candidate = candidate / np.linalg.norm(candidate, axis=1, keepdims=True)
+    cosines = (reference * candidate).sum(axis=1)
+    return {
+        "mean_cosine": float(cosines.mean()),
+        "min_cosine": float(cosines.min()),
+        "count": int(len(cosines))
+    }
+
+def _sample_corpus_texts(limit: int) -> list:
+    """Pull a few documents from the bundled data files"""
+    import json
+
+    texts = []
+    for path in (os.path.join(Config.ASSESSMENTS_PATH, "assessment_info_converted_v2.json"),
+                 os.path.join(Config.EXERCISES_PATH, "exercise_info_converted_v2.json")):
+        with open(path, "r", encoding="utf-8") as f:
+            texts.extend(item["content"] for item in json.load(f)[:limit // 2])
+    return texts
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export the int8 ONNX encoder and check parity with PyTorch")
+    parser.add_argument("--samples", type=int, default=64, help="Number of corpus texts to compare")
+    parser.add_argument("--export-only", action="store_true", help="Only export/quantize the model")
+    args = parser.parse_args()
+
+    if args.export_only:
+        export_quantized_model(Config.BIOBERT_MODEL, Config.ONNX_MODEL_DIR)
+    else:
+        from backend.services.biobert_embedder import BioBERTEmbedder
+
+        report = BioBERTEmbedder.parity_check(_sample_corpus_texts(args.samples))
+        for key, value in report.items():
+            print(f"{key}: {value}")
@@ -0,0 +1,140 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from backend.config import Config
+
+def normalize_query(text: str) -> str:
+    """Collapse whitespace; case is kept because BioBERT v1.1 is a cased model"""
+    return " ".join(text.split())
+
+class InMemoryQueryCacheBackend:
+    """Per-process LRU with a TTL on every entry"""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, vector = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return vector
+
+    def set(self, key: str, vector: List[float]):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class RedisQueryCacheBackend:
+    """Shared cache so every worker benefits from queries embedded by the others"""
+
+    def __init__(self, url: str, ttl_seconds: float, prefix: str = "physio:query-embedding:"):
+        import redis  # optional dependency, only needed for QUERY_CACHE_BACKEND=redis
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl_seconds = int(ttl_seconds)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[List[float]]:
+        raw = self.client.get(self.prefix + key)
+        if raw is None:
+            return None
+        return np.frombuffer(raw, dtype=np.float32).tolist()
+
+    def set(self, key: str, vector: List[float]):
+        payload = np.asarray(vector, dtype=np.float32).tobytes()
+        self.client.setex(self.prefix + key, self.ttl_seconds, payload)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.client.scan_iter(match=self.prefix + "*"))
+
+class QueryEmbeddingCache:
+    """Normalized query text -> embedding, in front of the embedding model"""
+
+    def __init__(self, backend, namespace: str):
+        self.backend = backend
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, normalized: str) -> str:
+        return f"{self.namespace}\x00{normalized}"
+
+    def get_or_embed(self, query: str, embed: Callable[[str], List[float]]) -> List[float]:
+        """Return the cached vector for query, embedding and storing it on a miss"""
+        normalized = normalize_query(query)
+        key = self._key(normalized)
+
+        vector = self.backend.get(key)
+        if vector is not None:
+            self.hits += 1
+            return vector
+
+        self.misses += 1
+        vector = embed(normalized)
+        self.backend.set(key, vector)
+        return vector
+
+    def get_or_embed_many(self, queries: List[str],
+                          embed_many: Callable[[List[str]], List[List[float]]]) -> List[List[float]]:
+        """Batch variant: all misses are embedded together in a single call"""
+        normalized = [normalize_query(query) for query in queries]
+        vectors = [self.backend.get(self._key(text)) for text in normalized]
+
+        missing = list(dict.fromkeys(text for text, vector in zip(normalized, vectors) if vector is None))
+        self.hits += sum(1 for vector in vectors if vector is not None)
+        self.misses += len(queries) - sum(1 for vector in vectors if vector is not None)
+
+        if missing:
+            embedded = dict(zip(missing, embed_many(missing)))
+            for text, vector in embedded.items():
+                self.backend.set(self._key(text), vector)
+            vectors = [vector if vector is not None else embedded[text]
+                       for text, vector in zip(normalized, vectors)]
+        return vectors
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": len(self.backend),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+def _build_query_cache() -> Optional[QueryEmbeddingCache]:
+    if not Config.QUERY_CACHE_ENABLED:
+        return None
+
+    if Config.QUERY_CACHE_BACKEND == "redis":
+        backend = RedisQueryCacheBackend(Config.REDIS_URL, Config.QUERY_CACHE_TTL_SECONDS)
+    else:
+        backend = InMemoryQueryCacheBackend(Config.QUERY_CACHE_MAX_ENTRIES, Config.QUERY_CACHE_TTL_SECONDS)
+
+    from backend.services.biobert_embedder import BioBERTEmbedder
+    from backend.services.vector_postprocess import vector_postprocessor
+
+    # Cached vectors are post-processed, so the pipeline is part of the namespace
+    namespace = f"{BioBERTEmbedder.model_id_for(Config.EMBEDDING_BACKEND)}|{vector_postprocessor.signature()}"
+    return QueryEmbeddingCache(backend, namespace=namespace)
+
+# Singleton instance (None when disabled)
+query_cache = _build_query_cache()
@@ -0,0 +1,96 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from backend.config import Config
+from backend.services.executor import blocking_executor
+from backend.services.rag_service import rag_service
+from backend.services.telemetry import log_event
+
+class PrefetchEntry:
+    """Summary context being assembled for one chat, and the user messages it covers"""
+
+    def __init__(self, queries: List[str], waits: List[asyncio.Task]):
+        self.queries = queries
+        self.waits = waits  # tasks that update the chat's RAG state before this one
+        self.task: Optional[asyncio.Task] = None
+        self.running = False  # on the executor, where cancelling no longer stops it
+
+class RAGPrefetcher:
+    """Assembles a chat's summary context in the background while intake goes on.
+
+    ``start`` runs the full RAG pipeline (per-message hits, consolidated
+    query, MMR packing) for the history so far as an asyncio task, on the
+    blocking executor, so it overlaps with the intake LLM call of the same
+    turn. If that turn completes the intake, ``context`` hands the result to
+    the summary instead of retrieving again; it is only used while the
+    chat's user messages are exactly the ones it was built from. Entries are
+    per process and keyed by chat ID; a missing or outdated one just means
+    the summary retrieves inline as before. An outdated one is cancelled, or
+    awaited if already running, so it never writes retrieval state after
+    the summary's own retrieval or after the chat is forgotten.
+    """
+
+    def __init__(self, rag, max_chats: int):
+        self.rag = rag
+        self.max_chats = max_chats
+        # chat_id -> PrefetchEntry, least recently started first
+        self._entries: "OrderedDict[str, PrefetchEntry]" = OrderedDict()
+
+    def start(self, chat_id: str, chat_history: List[Dict], after: Optional[asyncio.Task] = None):
+        """Start assembling the summary context for this history (no-op if already under way),
+        once ``after`` (e.g. the chat's last per-turn retrieval) has finished"""
+        queries = self.rag.message_queries(chat_history)
+        previous = self._entries.pop(chat_id, None)
+        if previous is not None and previous.queries == queries:
+            self._entries[chat_id] = previous
+            return
+
+        entry = PrefetchEntry(queries, [task for task in (after, previous.task if previous else None) if task is not None])
+        entry.task = asyncio.create_task(self._assemble(chat_id, chat_history, entry))
+        self._entries[chat_id] = entry
+        while len(self._entries) > self.max_chats:
+            self._entries.popitem(last=False)
+
+    async def _assemble(self, chat_id: str, chat_history: List[Dict], entry: PrefetchEntry) -> Optional[str]:
+        # One retrieval per chat at a time, so the previous turn's updates to the RAG state land first
+        if entry.waits:
+            await asyncio.wait(entry.waits)
+        entry.running = True
+        try:
+            return await blocking_executor.run(self.rag.get_rag_context, chat_history, chat_id)
+        except Exception as e:
+            log_event("rag.prefetch_failed", level=logging.WARNING, chat_id=chat_id, error=str(e))
+            return None
+
+    async def context(self, chat_id: str, chat_history: List[Dict]) -> Optional[str]:
+        """The prefetched context for exactly this history, waiting for it if still running; None otherwise"""
+        entry = self._entries.pop(chat_id, None)
+        if entry is None or entry.queries != self.rag.message_queries(chat_history):
+            log_event("rag.prefetch", chat_id=chat_id, hit=False)
+            if entry is not None:
+                await self._discard(entry)
+            return None
+
+        ready = entry.task.done()
+        context = await entry.task
+        log_event("rag.prefetch", chat_id=chat_id, hit=context is not None, ready=ready)
+        return context
+
+    async def discard(self, chat_id: str):
+        """Drop the chat's prefetch, once nothing it started can still change its RAG state"""
+        entry = self._entries.pop(chat_id, None)
+        if entry is not None:
+            await self._discard(entry)
+
+    @staticmethod
+    async def _discard(entry: PrefetchEntry):
+        if not entry.running:
+            # Still waiting for its turn: it never reaches get_rag_context
+            entry.task.cancel()
+        # A cancelled entry doesn't wait for the updates queued before it, so wait for those too
+        await asyncio.wait([entry.task, *entry.waits])
+
+# Singleton instance (None when disabled)
+rag_prefetcher = RAGPrefetcher(rag_service, max_chats=Config.RAG_STATE_MAX_CONVERSATIONS) if Config.RAG_PREFETCH_ENABLED else None
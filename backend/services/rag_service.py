@@ -1,14 +1,54 @@
-from backend.services.weaviate_store import weaviate_store
-from backend.services.gemini_llm import gemini_llm
-from typing import List, Dict
+import threading
+from collections import OrderedDict
+from backend.config import Config
+from backend.services.chunker import collapse_to_parents
+from backend.services.vector_store import vector_store
+from backend.services.lexical_index import lexical_index
+from backend.services.biobert_embedder import biobert_embedder
+from backend.services.reranker import context_assembler
+from backend.services.telemetry import stage
+from backend.services.llm import llm
+from typing import List, Dict, Optional
+
+def reciprocal_rank_fusion(rankings: List[List[Dict]], k: int = 60, limit: Optional[int] = None) -> List[Dict]:
+    """Fuse ranked hit lists: each document scores sum(1 / (k + rank)) over the lists it appears in.
+
+    Documents are matched by parent_id (falling back to content); the hit
+    from the first list that contains a document is kept.
+    """
+    scores = {}
+    hits = {}
+    for ranking in rankings:
+        for rank, hit in enumerate(ranking, start=1):
+            key = hit.get('parent_id') or hit.get('content')
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            hits.setdefault(key, hit)
+
+    fused = sorted(scores, key=scores.get, reverse=True)[:limit]
+    return [dict(hits[key], _additional={**hits[key].get('_additional', {}), "rrf_score": scores[key]}) for key in fused]
+
+class ConversationRetrievalState:
+    """Per-message queries of one conversation that were already embedded and searched"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.queries: List[str] = []
+        self.vectors: List[List[float]] = []
+        self.hits: List[List[Dict]] = []
 
 class RAGService:
-    def __init__(self):
-        self.weaviate = weaviate_store
-        self.llm = gemini_llm
+    def __init__(self, store=None):
+        # Defaults to the configured store; benchmarks pass their own
+        self.store = store if store is not None else vector_store
+        self.lexical_index = lexical_index
+        self.llm = llm
+        self.assembler = context_assembler
+        # chat_id -> ConversationRetrievalState, least recently used first
+        self._conversations: "OrderedDict[str, ConversationRetrievalState]" = OrderedDict()
+        self._conversations_lock = threading.Lock()
     
-    def generate_search_queries(self, chat_history: List[Dict]) -> List[str]:
-        """Generate search queries from chat history"""
+    def message_queries(self, chat_history: List[Dict]) -> List[str]:
+        """One search query per user message"""
         # Extract key symptoms and complaints from chat
         queries = []
         
@@ -18,39 +58,150 @@ class RAGService:
                 content = msg['content'].lower()
                 queries.append(content)
         
-        # Create a consolidated query
-        all_user_messages = " ".join([msg['content'] for msg in chat_history if msg['role'] == 'user'])
-        queries.append(all_user_messages)
-        
         return queries
     
-    def retrieve_context(self, queries: List[str], limit: int = 10) -> str:
-        """Retrieve relevant context from Weaviate"""
-        all_results = []
+    def consolidated_query(self, chat_history: List[Dict]) -> str:
+        """All user messages as a single query"""
+        return " ".join([msg['content'] for msg in chat_history if msg['role'] == 'user'])
+    
+    def generate_search_queries(self, chat_history: List[Dict]) -> List[str]:
+        """Generate search queries from chat history"""
+        return self.message_queries(chat_history) + [self.consolidated_query(chat_history)]
+    
+    def search_specs(self, limit: int) -> List[tuple]:
+        """(filter, limit) pairs searched for every query: one per RAG_TYPE_QUOTAS entry, or one unfiltered search"""
+        if Config.RAG_TYPE_QUOTAS:
+            return [({"type": doc_type}, quota) for doc_type, quota in Config.RAG_TYPE_QUOTAS.items()]
+        return [(None, limit)]
+    
+    def search(self, queries: List[str], limit: int, vectors: Optional[List[List[float]]] = None) -> List[List[Dict]]:
+        """Hits per query: vector search, or BM25 and vector rankings fused with RRF in hybrid mode.
+
+        With RAG_TYPE_QUOTAS, each query fetches a fixed number of hits per
+        type through filtered searches, all in the same store request.
+        """
+        if not queries:
+            return []
+        # One embedding pass (unless vectors are given) and one store request for every query
+        if vectors is None:
+            vectors = self.store.embed_queries(queries)
         
-        for query in queries:
-            results = self.weaviate.search(query, limit=limit)
-            all_results.extend(results)
+        specs = self.search_specs(limit)
+        spec_vectors = [vector for vector in vectors for _ in specs]
+        filters = [where for _ in queries for where, _ in specs]
+        limits = [quota for _ in queries for _, quota in specs]
+        results = self.store.search_many_vectors(spec_vectors, limit=limit, collapse_chunks=True,
+                                                 filters=filters, limits=limits)
         
-        # Deduplicate and format
-        unique_contents = set()
-        formatted_context = []
+        if Config.RETRIEVAL_MODE == "hybrid":
+            spec_queries = [query for query in queries for _ in specs]
+            with stage("lexical_search"):
+                lexical_results = self.lexical_index.search_many(
+                    spec_queries, filters=filters, limits=[quota * Config.CHUNK_SEARCH_OVERFETCH for quota in limits]
+                )
+            results = [
+                reciprocal_rank_fusion([vector_hits, collapse_to_parents(lexical_hits)[:quota]], k=Config.RRF_K, limit=quota)
+                for vector_hits, lexical_hits, quota in zip(results, lexical_results, limits)
+            ]
+        elif Config.RETRIEVAL_MODE != "vector":
+            raise ValueError(f"Unknown RETRIEVAL_MODE '{Config.RETRIEVAL_MODE}', expected 'vector' or 'hybrid'")
         
-        for result in all_results:
-            content = result.get('content', '')
-            if content and content not in unique_contents:
-                unique_contents.add(content)
-                doc_type = result.get('type', 'unknown')
-                category = result.get('category', '')
-                formatted_context.append(f"[{doc_type.upper()} - {category}]\n{content}\n")
+        # Regroup the per-spec hit lists into one list per query
+        return [sum(results[i * len(specs):(i + 1) * len(specs)], []) for i in range(len(queries))]
+
+    def format_context(self, result_lists: List[List[Dict]], query_vectors: Optional[List[List[float]]] = None) -> str:
+        """Deduplicate hits across queries and format them for the prompt.
+
+        With query vectors (and RERANK_ENABLED), entries are re-ranked with
+        MMR and packed under CONTEXT_TOKEN_BUDGET.
+        """
+        with stage("context_assembly"):
+            all_results = []
+            for results in result_lists:
+                all_results.extend(results)
+        
+            # Deduplicate and format
+            unique_contents = set()
+            unique_results = []
+            formatted_context = []
+        
+            for result in all_results:
+                content = result.get('content', '')
+                if content and content not in unique_contents:
+                    unique_contents.add(content)
+                    doc_type = result.get('type', 'unknown')
+                    category = result.get('category', '')
+                    unique_results.append(result)
+                    formatted_context.append(f"[{doc_type.upper()} - {category}]\n{content}\n")
+        
+            if Config.RERANK_ENABLED and query_vectors:
+                # Stored vectors only for the deduplicated hits; the rest (BM25-only hits) are
+                # embedded through the corpus embedding cache
+                vectors = self.store.fetch_vectors(unique_results)
+                unique_results = [
+                    dict(hit, _additional={**hit.get('_additional', {}), "vector": vector}) if vector is not None else hit
+                    for hit, vector in zip(unique_results, vectors)
+                ]
+                kept = self.assembler.assemble(unique_results, formatted_context, query_vectors,
+                                               embed=biobert_embedder.get_batch_embeddings)
+                formatted_context = [formatted_context[i] for i in kept]
         
         return "\n".join(formatted_context)
     
-    def get_rag_context(self, chat_history: List[Dict]) -> str:
-        """Complete RAG pipeline: generate queries and retrieve context"""
-        queries = self.generate_search_queries(chat_history)
-        context = self.retrieve_context(queries)
-        return context
+    def retrieve_context(self, queries: List[str], limit: Optional[int] = None) -> str:
+        """Retrieve relevant context from the vector store (and BM25 index in hybrid mode)"""
+        vectors = self.store.embed_queries(queries) if queries else []
+        results = self.search(queries, limit=limit or Config.RAG_SEARCH_LIMIT, vectors=vectors)
+        return self.format_context(results, vectors)
+    
+    def update_conversation(self, chat_id: str, chat_history: List[Dict]) -> ConversationRetrievalState:
+        """Embed and search only the user messages not seen before in this conversation.
+
+        State is kept in memory per process; when it is missing (evicted,
+        restarted, another worker) or the history no longer matches, it is
+        rebuilt from the full history.
+        """
+        limit = Config.RAG_SEARCH_LIMIT
+        queries = self.message_queries(chat_history)
+
+        with self._conversations_lock:
+            state = self._conversations.pop(chat_id, None)
+        if state is None or state.limit != limit or state.queries != queries[:len(state.queries)]:
+            state = ConversationRetrievalState(limit)
+
+        new_queries = queries[len(state.queries):]
+        if new_queries:
+            vectors = self.store.embed_queries(new_queries)
+            state.hits.extend(self.search(new_queries, limit=limit, vectors=vectors))
+            state.vectors.extend(vectors)
+            state.queries.extend(new_queries)
+
+        with self._conversations_lock:
+            self._conversations[chat_id] = state
+            while len(self._conversations) > Config.RAG_STATE_MAX_CONVERSATIONS:
+                self._conversations.popitem(last=False)
+        return state
+    
+    def forget_conversation(self, chat_id: str):
+        """Drop retrieval state once a conversation is finished"""
+        with self._conversations_lock:
+            self._conversations.pop(chat_id, None)
+    
+    def get_rag_context(self, chat_history: List[Dict], chat_id: Optional[str] = None) -> str:
+        """Complete RAG pipeline: generate queries and retrieve context.
+
+        With a chat_id, hits accumulated turn by turn are reused and only the
+        consolidated query is searched here.
+        """
+        if chat_id is None:
+            queries = self.generate_search_queries(chat_history)
+            return self.retrieve_context(queries)
+
+        state = self.update_conversation(chat_id, chat_history)
+        consolidated = [self.consolidated_query(chat_history)]
+        consolidated_vectors = self.store.embed_queries(consolidated)
+        consolidated_hits = self.search(consolidated, limit=state.limit, vectors=consolidated_vectors)
+        return self.format_context(state.hits + consolidated_hits, state.vectors + consolidated_vectors)
 
 # Singleton instance
 rag_service = RAGService()
\ No newline at end of file
@@ -0,0 +1,140 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from backend.services.telemetry import log_event
+
+class LazyService:
+    """Stand-in for a service singleton that is only built on first use.
+
+    Attribute access is forwarded to the real instance, so existing
+    ``from ... import biobert_embedder`` call sites keep working unchanged.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Any]):
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_instance", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._instance is not None
+
+    def resolve(self) -> Any:
+        """Build the service if needed and return the real instance"""
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    start = time.perf_counter()
+                    instance = self._factory()
+                    object.__setattr__(self, "_instance", instance)
+                    log_event("registry.loaded", level=logging.INFO, service=self._name,
+                              seconds=round(time.perf_counter() - start, 2))
+        return self._instance
+
+    def __getattr__(self, item):
+        return getattr(self.resolve(), item)
+
+    def __setattr__(self, key, value):
+        setattr(self.resolve(), key, value)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.is_loaded else "not loaded"
+        return f"<LazyService {self._name} ({state})>"
+
+class ServiceRegistry:
+    """Holds the lazily constructed service singletons and their warmup"""
+
+    def __init__(self):
+        self._services: Dict[str, LazyService] = {}
+        self._warmups: Dict[str, Callable[[Any], None]] = {}
+        self._ready = threading.Event()
+        self._warmup_thread: Optional[threading.Thread] = None
+        self._warmed: set = set()  # services whose warmup hook has run
+        self.warmup_error: Optional[str] = None
+        self.warmup_seconds: Optional[float] = None
+        self.warmup_attempts = 0
+
+    def register(self, name: str, factory: Callable[[], Any],
+                 warmup: Optional[Callable[[Any], None]] = None) -> LazyService:
+        """Register a service factory and return its lazy proxy"""
+        service = LazyService(name, factory)
+        self._services[name] = service
+        if warmup is not None:
+            self._warmups[name] = warmup
+        return service
+
+    def get(self, name: str) -> Any:
+        return self._services[name].resolve()
+
+    @property
+    def is_ready(self) -> bool:
+        return self._ready.is_set()
+
+    def mark_ready(self):
+        self._ready.set()
+
+    def warmup(self, background: bool = False, retry_seconds: float = 0.0, max_retry_seconds: float = 60.0):
+        """Construct every registered service and run its warmup hook.
+
+        With retry_seconds > 0, a failed warmup (e.g. Weaviate not up yet) is
+        retried in a background thread, doubling the delay up to
+        max_retry_seconds, until every service is ready.
+        """
+        if background:
+            self._start_warmup_thread(retry_seconds, max_retry_seconds, wait_first=False)
+        elif not self._run_warmup(retry_seconds) and retry_seconds > 0:
+            self._start_warmup_thread(retry_seconds, max_retry_seconds, wait_first=True)
+
+    def _start_warmup_thread(self, retry_seconds: float, max_retry_seconds: float, wait_first: bool):
+        self._warmup_thread = threading.Thread(target=self._warm_until_ready, name="service-warmup", daemon=True,
+                                               args=(retry_seconds, max_retry_seconds, wait_first))
+        self._warmup_thread.start()
+
+    def _warm_until_ready(self, retry_seconds: float, max_retry_seconds: float, wait_first: bool):
+        delay = retry_seconds
+        if wait_first:
+            time.sleep(delay)
+            delay = min(delay * 2, max_retry_seconds)
+        while not self._run_warmup(delay) and delay > 0:
+            time.sleep(delay)
+            delay = min(delay * 2, max_retry_seconds)
+
+    def _run_warmup(self, retry_in: float = 0.0) -> bool:
+        """One warmup attempt; services built and warmed by earlier attempts are skipped"""
+        start = time.perf_counter()
+        self.warmup_attempts += 1
+        try:
+            for name, service in list(self._services.items()):
+                instance = service.resolve()
+                hook = self._warmups.get(name)
+                if hook is not None and name not in self._warmed:
+                    hook(instance)
+                    self._warmed.add(name)
+        except Exception as e:
+            # Stay unready until an attempt succeeds; requests still resolve services lazily meanwhile
+            self.warmup_error = f"{type(e).__name__}: {e}"
+            log_event("registry.warmup_failed", level=logging.WARNING, error=self.warmup_error,
+                      attempt=self.warmup_attempts, retry_in_seconds=retry_in or None)
+            return False
+        self.warmup_seconds = time.perf_counter() - start
+        self.warmup_error = None
+        self._ready.set()
+        log_event("registry.warmup_finished", level=logging.INFO, seconds=round(self.warmup_seconds, 2),
+                  attempt=self.warmup_attempts)
+        return True
+
+    def status(self) -> Dict:
+        """Readiness summary for health checks"""
+        return {
+            "ready": self.is_ready,
+            "services": {name: service.is_loaded for name, service in self._services.items()},
+            "warmup_seconds": self.warmup_seconds,
+            "warmup_attempts": self.warmup_attempts,
+            "warmup_error": self.warmup_error
+        }
+
+# Singleton instance
+registry = ServiceRegistry()
@@ -0,0 +1,91 @@
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from backend.config import Config
+from backend.services.chunker import document_chunker
+from backend.services.telemetry import log_event
+
+def _unit_rows(vectors) -> np.ndarray:
+    matrix = np.asarray(vectors, dtype=np.float32)
+    return matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+def mmr(query_vectors: List[List[float]], candidate_vectors: List[List[float]],
+        k: Optional[int] = None, lambda_: float = 0.7) -> List[int]:
+    """Greedy maximal marginal relevance over cosine similarities.
+
+    Relevance is a candidate's best similarity to any of the queries;
+    redundancy is its highest similarity to a candidate already picked.
+    Returns candidate indices in selection order.
+    """
+    candidates = _unit_rows(candidate_vectors)
+    count = len(candidates)
+    k = count if k is None else min(k, count)
+
+    relevance = (candidates @ _unit_rows(query_vectors).T).max(axis=1)
+    similarity = candidates @ candidates.T
+    redundancy = np.zeros(count, dtype=np.float32)
+    available = np.ones(count, dtype=bool)
+
+    order = []
+    for _ in range(k):
+        scores = np.where(available, lambda_ * relevance - (1 - lambda_) * redundancy, -np.inf)
+        best = int(np.argmax(scores))
+        order.append(best)
+        available[best] = False
+        np.maximum(redundancy, similarity[best], out=redundancy)
+    return order
+
+class ContextAssembler:
+    """Re-rank retrieved hits with MMR, then keep as many as fit a token budget.
+
+    Tokens are counted with the BioBERT tokenizer the chunker already
+    loads, which is local and deterministic; it tracks Gemini's count
+    closely enough to bound the prompt size.
+    """
+
+    def __init__(self, token_budget: int, mmr_lambda: float):
+        self.token_budget = token_budget
+        self.mmr_lambda = mmr_lambda
+
+    def count_tokens(self, texts: List[str]) -> List[int]:
+        encoded = document_chunker.tokenizer(texts, add_special_tokens=False, verbose=False)["input_ids"]
+        return [len(ids) for ids in encoded]
+
+    def assemble(self, hits: List[Dict], texts: List[str], query_vectors: List[List[float]],
+                 embed: Optional[Callable[[List[str]], List[List[float]]]] = None) -> List[int]:
+        """Indices of the hits to keep, most useful first.
+
+        ``texts`` are the formatted prompt entries for the hits. Vectors come
+        from ``_additional.vector``; hits without one (e.g. BM25-only hits)
+        are embedded with ``embed``.
+        """
+        if not hits:
+            return []
+
+        vectors = [hit.get('_additional', {}).get('vector') for hit in hits]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            if embed is None:
+                raise ValueError("Hits without vectors need an embed function for MMR")
+            for i, vector in zip(missing, embed([hits[i].get('content', '') for i in missing])):
+                vectors[i] = vector
+
+        order = mmr(query_vectors, vectors, lambda_=self.mmr_lambda)
+        counts = self.count_tokens(texts)
+
+        kept = []
+        used = 0
+        for i in order:
+            # Skip entries that don't fit; a shorter one further down may still
+            if used + counts[i] <= self.token_budget:
+                kept.append(i)
+                used += counts[i]
+
+        total = sum(counts)
+        log_event("rag.rerank", hits=len(hits), kept=len(kept), removed_hits=len(hits) - len(kept),
+                  tokens=total, kept_tokens=used, removed_tokens=total - used, budget=self.token_budget)
+        return kept
+
+# Singleton instance
+context_assembler = ContextAssembler(Config.CONTEXT_TOKEN_BUDGET, Config.RERANK_MMR_LAMBDA)
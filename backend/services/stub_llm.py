@@ -0,0 +1,160 @@
+import asyncio
+import json
+import re
+import time
+from typing import AsyncIterator, Iterator, List
+
+from backend.prompts.intake_prompt import INTAKE_FIELDS
+from backend.services.llm import LLMBackend
+from backend.services.telemetry import stage
+
+# One question per field of the info-gathering prompt, in its order
+INTAKE_QUESTIONS = [
+    "What is your preferred language for communication? English or Hindi?",
+    "May I know your name, please?",
+    "Thank you. How old are you?",
+    "What is your current weight?",
+    "What is the main problem that is bothering you?",
+    "Where exactly do you feel the pain or discomfort?",
+    "When did it start?",
+    "How long has it been going on?",
+    "On a scale of 0 to 10, how strong is the pain?",
+    "Which activities make it worse or better?",
+    "Have you tried any treatment for it so far?",
+    "Is there any redness in the painful area? (Yes/No)"
+]
+
+SUMMARY_RESPONSE = """---
+
+### Clinical Understanding
+Based on the information provided, it appears you are experiencing **pain that limits your daily activities**.
+
+### Chief Complaints
+- **Localised pain during movement**
+- **Stiffness after rest**
+- **Pain intensity (5/10)**
+
+### Provisional Diagnosis
+The symptoms suggest a possible case of **soft tissue strain**, commonly associated with **overuse**.
+
+### Assessment & Recommendation
+Your provisional assessment suggests a potential **muscle strain**.
+
+I recommend that you consult with a qualified physiotherapist who can provide a detailed assessment of your condition.
+
+**In the meantime, consider applying the R.I.C.E protocol.**
+
+---"""
+
+ANSWER_RESPONSE = """**Possible Reasons:** Overuse, poor posture or a minor strain of the surrounding muscles.
+**Basic Solutions:** Rest the area, apply ice for 15 minutes a few times a day and keep gently mobile.
+**Consultation Advice:** Please consult a qualified doctor or physiotherapist if it does not improve."""
+
+class StubLLM(LLMBackend):
+    """Deterministic stand-in for Gemini, for load tests and local development.
+
+    Recognises the prompts the app sends: the intake prompt gets the
+    latest user message as the value of the first missing field plus the
+    next question, the info-gathering prompt the next question (and
+    INFORMATION_COMPLETE once the patient has answered ``intake_turns``
+    times), the compaction prompt the previous summary plus one bullet per
+    new user message, the summary prompt a canned summary, anything else a
+    canned /ask answer. Each call sleeps for ``latency_ms`` plus the response's estimated tokens at
+    ``tokens_per_second``, so timings resemble a hosted model; ``stream``
+    spends the latency before the first word and paces the rest.
+    """
+
+    def __init__(self, latency_ms: float = 400.0, tokens_per_second: float = 150.0, intake_turns: int = 12):
+        self.latency_ms = latency_ms
+        self.tokens_per_second = tokens_per_second
+        self.intake_turns = intake_turns
+
+    @staticmethod
+    def count_tokens(text: str) -> int:
+        """Rough token count, about 4 characters per token"""
+        return max(1, len(text) // 4)
+
+    def simulated_seconds(self, response: str) -> float:
+        seconds = self.latency_ms / 1000
+        if self.tokens_per_second > 0:
+            seconds += self.count_tokens(response) / self.tokens_per_second
+        return seconds
+
+    def user_turns(self, prompt: str) -> List[str]:
+        """User lines of the transcript embedded in an info-gathering prompt"""
+        conversation = prompt.split("# CURRENT CONVERSATION:", 1)[1].split("# YOUR TASK:", 1)[0]
+        return [line for line in conversation.splitlines() if line.startswith("User:")]
+
+    def patient_messages(self, prompt: str) -> int:
+        """User messages of an info-gathering prompt, including those folded into a compacted summary"""
+        summarized = re.search(r"Summary of the earlier conversation \((\d+) patient messages\)", prompt)
+        return len(self.user_turns(prompt)) + (int(summarized.group(1)) if summarized else 0)
+
+    def intake_reply(self, prompt: str) -> str:
+        """'<updates JSON> --- <next question>' for an intake prompt"""
+        state = json.loads(prompt.split("# INTAKE STATE:", 1)[1].split("# CURRENT CONVERSATION:", 1)[0])
+        missing = [i for i, (key, _) in enumerate(INTAKE_FIELDS) if not state.get(key)]
+        turns = self.user_turns(prompt)
+
+        updates = {}
+        if missing and turns:
+            updates[INTAKE_FIELDS[missing.pop(0)][0]] = turns[-1][len("User:"):].strip()
+        question = INTAKE_QUESTIONS[missing[0]] if missing else "Thank you, that is everything I need."
+        return f"{json.dumps(updates)}\n---\n{question}"
+
+    def compaction_reply(self, prompt: str) -> str:
+        """Running summary for a compaction prompt: previous bullets plus the new user messages"""
+        previous, messages = prompt.split("# RUNNING SUMMARY:", 1)[1].split("# NEW MESSAGES:", 1)
+        messages = messages.split("# YOUR TASK:", 1)[0]
+        bullets = [line for line in previous.strip().splitlines() if line.startswith("- ")]
+        bullets += [f"- Patient said: {line[len('User:'):].strip()}" for line in messages.splitlines() if line.startswith("User:")]
+        # The prompt asks for at most 15 bullets
+        return "\n".join(bullets[-15:])
+
+    def respond(self, prompt: str) -> str:
+        """The canned response for a prompt, without the simulated delay"""
+        if "# RUNNING SUMMARY:" in prompt:
+            return self.compaction_reply(prompt)
+        if "# INTAKE STATE:" in prompt:
+            return self.intake_reply(prompt)
+        if "# CURRENT CONVERSATION:" in prompt:
+            answered = self.patient_messages(prompt)
+            if answered > self.intake_turns:
+                return "INFORMATION_COMPLETE"
+            # The first user message states the problem; every later one answers a question
+            return INTAKE_QUESTIONS[max(answered - 1, 0) % len(INTAKE_QUESTIONS)]
+        if "## [CHAT_TRANSCRIPT]" in prompt:
+            return SUMMARY_RESPONSE
+        return ANSWER_RESPONSE
+
+    def generate(self, prompt: str) -> str:
+        """Canned response after the simulated model latency"""
+        with stage("llm_generate"):
+            response = self.respond(prompt)
+            time.sleep(self.simulated_seconds(response))
+        return response
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        """Canned response word by word, at the simulated latency and token rate"""
+        with stage("llm_generate"):
+            response = self.respond(prompt)
+            time.sleep(self.latency_ms / 1000)
+            for word in re.findall(r"\s*\S+", response):
+                if self.tokens_per_second > 0:
+                    time.sleep(self.count_tokens(word) / self.tokens_per_second)
+                yield word
+
+    async def generate_async(self, prompt: str) -> str:
+        with stage("llm_generate"):
+            response = self.respond(prompt)
+            await asyncio.sleep(self.simulated_seconds(response))
+        return response
+
+    async def stream_async(self, prompt: str) -> AsyncIterator[str]:
+        with stage("llm_generate"):
+            response = self.respond(prompt)
+            await asyncio.sleep(self.latency_ms / 1000)
+            for word in re.findall(r"\s*\S+", response):
+                if self.tokens_per_second > 0:
+                    await asyncio.sleep(self.count_tokens(word) / self.tokens_per_second)
+                yield word
@@ -0,0 +1,122 @@
+import json
+import logging
+import random
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, List, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+from backend.config import Config
+
+# Set per request by the middleware in backend/app.py; "-" outside requests (scripts, startup)
+trace_id_var: ContextVar[str] = ContextVar("trace_id", default="-")
+route_var: ContextVar[str] = ContextVar("route", default="-")
+sampled_var: ContextVar[Optional[bool]] = ContextVar("sampled", default=None)
+# Benchmarks set a list here to collect (stage, seconds) pairs
+stage_recorder_var: ContextVar[Optional[list]] = ContextVar("stage_recorder", default=None)
+
+# Sub-millisecond cache hits up to multi-second LLM calls
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+STAGE_SECONDS = Histogram(
+    "physio_stage_duration_seconds",
+    "Time spent in one pipeline stage (tokenize, embed, vector_search, ...)",
+    ["stage", "route"],
+    buckets=LATENCY_BUCKETS
+)
+REQUEST_SECONDS = Histogram(
+    "physio_request_duration_seconds",
+    "End-to-end request latency",
+    ["route", "method", "status"],
+    buckets=LATENCY_BUCKETS
+)
+FIRST_TOKEN_SECONDS = Histogram(
+    "physio_time_to_first_token_seconds",
+    "Time from a streaming request arriving to its first response token",
+    ["route"],
+    buckets=LATENCY_BUCKETS
+)
+REQUESTS_TOTAL = Counter("physio_requests_total", "Requests handled", ["route", "method", "status"])
+EMBEDDING_QUEUE_DEPTH = Gauge("physio_embedding_queue_depth", "Query embeddings waiting for the micro-batching scheduler")
+EMBEDDING_BATCH_SIZE = Histogram(
+    "physio_embedding_batch_size",
+    "Query embeddings per scheduler forward pass",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+)
+EMBEDDING_QUEUE_WAIT_SECONDS = Histogram(
+    "physio_embedding_queue_wait_seconds",
+    "Time a query embedding waited in the scheduler queue before its forward pass",
+    buckets=LATENCY_BUCKETS
+)
+
+logger = logging.getLogger("physio")
+if not logger.handlers:
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+def new_trace_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+def should_sample() -> bool:
+    """Whether debug logs are emitted: decided once per request, per event outside requests"""
+    sampled = sampled_var.get()
+    if sampled is None:
+        return Config.LOG_SAMPLE_RATE > 0 and random.random() < Config.LOG_SAMPLE_RATE
+    return sampled
+
+def log_event(event: str, level: int = logging.DEBUG, **fields):
+    """One JSON log line tagged with the trace ID and route.
+
+    Debug events are sampled (LOG_SAMPLE_RATE, 0 switches them off);
+    anything at INFO or above is always written.
+    """
+    if level < logging.INFO and not should_sample():
+        return
+    record = {"event": event, "trace_id": trace_id_var.get(), "route": route_var.get(), **fields}
+    logger.log(max(level, logging.INFO), json.dumps(record, default=str))
+
+@contextmanager
+def stage(name: str):
+    """Time a block into the stage histogram, labelled with the current route"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        if Config.METRICS_ENABLED:
+            STAGE_SECONDS.labels(stage=name, route=route_var.get()).observe(elapsed)
+        recorder = stage_recorder_var.get()
+        if recorder is not None:
+            recorder.append((name, elapsed))
+
+def observe_request(route: str, method: str, status: int, seconds: float):
+    if Config.METRICS_ENABLED:
+        REQUEST_SECONDS.labels(route=route, method=method, status=str(status)).observe(seconds)
+        REQUESTS_TOTAL.labels(route=route, method=method, status=str(status)).inc()
+
+def observe_first_token(seconds: float):
+    if Config.METRICS_ENABLED:
+        FIRST_TOKEN_SECONDS.labels(route=route_var.get()).observe(seconds)
+
+def track_embedding_queue(depth: Callable[[], int]):
+    """Report the scheduler's queue depth at scrape time"""
+    if Config.METRICS_ENABLED:
+        EMBEDDING_QUEUE_DEPTH.set_function(depth)
+
+def observe_embedding_batch(waits: List[float]):
+    """One scheduler forward pass: its size and how long each request waited for it"""
+    if Config.METRICS_ENABLED:
+        EMBEDDING_BATCH_SIZE.observe(len(waits))
+        for wait in waits:
+            EMBEDDING_QUEUE_WAIT_SECONDS.observe(wait)
+
+def metrics_payload() -> tuple:
+    """(body, content type) in the Prometheus text format"""
+    return generate_latest(), CONTENT_TYPE_LATEST
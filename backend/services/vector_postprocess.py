@@ -0,0 +1,106 @@
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+
+from backend.config import Config
+
+class VectorPostProcessor:
+    """Post-processing applied to raw BioBERT vectors before they are stored or searched.
+
+    Steps, in order: optional PCA projection (fitted on our corpus and
+    loaded from disk), optional L2 normalization, cast to the output dtype.
+    Document and query vectors must go through the same processor.
+    """
+
+    def __init__(self, normalize: bool = False, dtype: str = "float32", pca_path: Optional[str] = None,
+                 pca: Optional[Tuple[np.ndarray, np.ndarray]] = None):
+        if dtype not in ("float32", "float16"):
+            raise ValueError(f"Unsupported EMBEDDING_DTYPE '{dtype}', expected 'float32' or 'float16'")
+        self.normalize = normalize
+        self.dtype = np.dtype(dtype)
+        self.pca_path = pca_path
+        self.pca_mean: Optional[np.ndarray] = None
+        self.pca_components: Optional[np.ndarray] = None
+
+        if pca_path:
+            if not os.path.exists(pca_path):
+                raise FileNotFoundError(f"PCA projection not found at {pca_path}; "
+                                        f"fit one with python -m backend.services.vector_postprocess")
+            self.pca_mean, self.pca_components = load_pca(pca_path)
+        elif pca is not None:
+            # In-memory projection, e.g. one being evaluated before it is saved
+            self.pca_mean, self.pca_components = pca
+
+    @property
+    def is_identity(self) -> bool:
+        return self.pca_components is None and not self.normalize and self.dtype == np.float32
+
+    @property
+    def output_dim(self) -> Optional[int]:
+        return None if self.pca_components is None else int(self.pca_components.shape[0])
+
+    def signature(self) -> str:
+        """Short description of the pipeline, used to namespace cached processed vectors"""
+        parts = []
+        if self.pca_components is not None:
+            source = os.path.basename(self.pca_path) if self.pca_path else "inline"
+            parts.append(f"pca{self.output_dim}:{source}")
+        if self.normalize:
+            parts.append("l2")
+        parts.append(self.dtype.name)
+        return "+".join(parts)
+
+    def apply(self, vectors: np.ndarray) -> np.ndarray:
+        """Process a (n, dim) matrix of raw vectors"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.pca_components is not None:
+            vectors = (vectors - self.pca_mean) @ self.pca_components.T
+        if self.normalize:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.maximum(norms, 1e-12)
+        return vectors.astype(self.dtype)
+
+def fit_pca(vectors: np.ndarray, dim: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Fit a PCA projection; returns (mean, components) with components shaped (dim, input_dim)"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dim > min(vectors.shape):
+        raise ValueError(f"Cannot fit {dim} components from {vectors.shape[0]} vectors of size {vectors.shape[1]}")
+    mean = vectors.mean(axis=0)
+    _, _, vt = np.linalg.svd(vectors - mean, full_matrices=False)
+    return mean, vt[:dim]
+
+def save_pca(path: str, mean: np.ndarray, components: np.ndarray):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    np.savez(path, mean=mean.astype(np.float32), components=components.astype(np.float32))
+
+def load_pca(path: str) -> Tuple[np.ndarray, np.ndarray]:
+    data = np.load(path)
+    return data["mean"], data["components"]
+
+# Singleton instance
+vector_postprocessor = VectorPostProcessor(
+    normalize=Config.EMBEDDING_NORMALIZE,
+    dtype=Config.EMBEDDING_DTYPE,
+    pca_path=Config.EMBEDDING_PCA_PATH or None
+)
+
+if __name__ == "__main__":
+    import argparse
+    from benchmarks.corpus import load_corpus_texts
+    from backend.services.biobert_embedder import BioBERTEmbedder
+
+    parser = argparse.ArgumentParser(description="Fit a PCA projection for BioBERT vectors on our corpus")
+    parser.add_argument("--dim", type=int, default=256, help="Number of components to keep")
+    parser.add_argument("--output", default=Config.EMBEDDING_PCA_PATH or ".cache/pca/biobert_pca256.npz")
+    parser.add_argument("--limit", type=int, default=None, help="Only use the first N documents")
+    args = parser.parse_args()
+
+    texts = load_corpus_texts(limit=args.limit)
+    raw = np.array(BioBERTEmbedder().get_batch_embeddings(texts, postprocess=False))
+    mean, components = fit_pca(raw, args.dim)
+    save_pca(args.output, mean, components)
+    print(f"Saved {args.dim}-component PCA fitted on {len(texts)} documents to {args.output}")
+    print(f"Set EMBEDDING_PCA_PATH={args.output} and re-ingest so stored and query vectors match")
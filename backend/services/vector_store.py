@@ -0,0 +1,198 @@
+import logging
+import time
+from typing import Dict, List, Optional
+from backend.config import Config
+from backend.services.biobert_embedder import biobert_embedder
+from backend.services.chunker import collapse_to_parents, document_chunker, document_id
+from backend.services.embedding_pool import EmbeddingWorkerPool
+from backend.services.embedding_scheduler import embedding_scheduler
+from backend.services.lexical_index import lexical_index
+from backend.services.query_cache import query_cache
+from backend.services.registry import registry
+from backend.services.telemetry import log_event, stage
+
+# Properties returned with every search hit
+RESULT_PROPERTIES = ["content", "type", "category", "parent_id", "chunk_index"]
+
+class VectorStore:
+    """Ingestion and query pipeline shared by every vector store.
+
+    Subclasses only implement ``_write_objects`` (persist objects with
+    their vectors) and ``search_by_vector`` (nearest neighbours for one
+    vector, returned in Weaviate's hit format).
+    """
+
+    def _write_objects(self, objects: List[Dict], embeddings: List[List[float]]):
+        raise NotImplementedError
+
+    def search_by_vector(self, vector: List[float], limit: int = 5) -> List[Dict]:
+        raise NotImplementedError
+
+    def search_many_by_vector(self, vectors: List[List[float]], limit: int = 5, include_vectors: bool = False,
+                              filters: Optional[List[Optional[Dict]]] = None,
+                              limits: Optional[List[int]] = None) -> List[List[Dict]]:
+        """Nearest neighbours for several vectors; stores override this with a single request.
+
+        ``filters`` and ``limits`` (one per vector) restrict each search to a
+        type/category and override ``limit``. With include_vectors, stores
+        that support it return each hit's stored vector in ``_additional.vector``.
+        """
+        if filters is not None and any(filters):
+            raise NotImplementedError(f"{type(self).__name__} does not support filtered search")
+        return [self.search_by_vector(vector, limits[i] if limits is not None else limit)
+                for i, vector in enumerate(vectors)]
+
+    def fetch_vectors(self, hits: List[Dict]) -> List[Optional[List[float]]]:
+        """Stored vectors of search hits (None where unknown); stores override this with one small request.
+
+        Used for the few hits that survive deduplication, so searches don't
+        have to return a vector with every over-fetched hit.
+        """
+        return [hit.get('_additional', {}).get('vector') for hit in hits]
+
+    def _prepare_objects(self, documents: List[Dict]) -> List[Dict]:
+        """Turn documents into the objects we store: token-sized chunks linked to their parent."""
+        if Config.CHUNKING_ENABLED:
+            return document_chunker.chunk_documents(documents)
+        return [
+            {
+                "content": doc['content'],
+                "type": doc['type'],
+                "category": doc.get('category', ''),
+                "parent_id": document_id(doc['content']),
+                "chunk_index": 0,
+                "chunk_count": 1
+            }
+            for doc in documents
+        ]
+
+    def _embed_objects(self, objects: List[Dict], workers: int = 0) -> List[List[float]]:
+        """Embed all objects in one batched pass (or across a process pool)."""
+        texts = [obj['content'] for obj in objects]
+        if workers > 1:
+            with EmbeddingWorkerPool(workers, Config.EMBEDDING_THREADS_PER_WORKER or None) as pool:
+                return pool.embed(texts)
+        return biobert_embedder.get_batch_embeddings(texts)
+
+    def add_document(self, content: str, doc_type: str, category: str):
+        """Add a single document with BioBERT embedding."""
+        self.add_batch_documents([{"content": content, "type": doc_type, "category": category}], workers=0)
+
+    def add_batch_documents(self, documents: List[Dict], workers: int = 0):
+        """Add multiple documents in batch.
+
+        Long documents are split into chunks first; every chunk of every
+        document is embedded together. With workers > 1 the embeddings are
+        computed by a process pool (ingest_data.py passes EMBEDDING_WORKERS),
+        otherwise with batched forward passes in this process; servers keep
+        the default so a request never spawns processes that each reload
+        BioBERT. The same objects are added to the BM25 index.
+        """
+        objects = self._prepare_objects(documents)
+        start = time.perf_counter()
+        embeddings = self._embed_objects(objects, workers)
+        elapsed = time.perf_counter() - start
+        # Always logged (INFO), so ingest_data.py reports its throughput on every run
+        log_event("ingest.batch", level=logging.INFO, documents=len(documents), chunks=len(objects),
+                  workers=workers, embed_seconds=round(elapsed, 2),
+                  chunks_per_second=round(len(objects) / elapsed, 1) if elapsed > 0 else 0.0)
+        self._write_objects(objects, embeddings)
+        if Config.LEXICAL_INDEX_ENABLED:
+            lexical_index.add(objects)
+
+    def _embed_query_uncached(self, query: str) -> List[float]:
+        if Config.EMBEDDING_SCHEDULER_ENABLED:
+            return embedding_scheduler.embed(query)
+        return biobert_embedder.get_embedding(query)
+
+    def _embed_queries_uncached(self, queries: List[str]) -> List[List[float]]:
+        # Through the scheduler, concurrent retrievals (chat turns, summaries, /ask) share forward passes
+        if Config.EMBEDDING_SCHEDULER_ENABLED:
+            return embedding_scheduler.embed_many(queries)
+        return biobert_embedder.get_batch_embeddings(queries, use_cache=False)
+
+    def embed_query(self, query: str) -> List[float]:
+        """Embed a search query; repeated queries are served from the query cache."""
+        if query_cache is not None:
+            return query_cache.get_or_embed(query, self._embed_query_uncached)
+        return self._embed_query_uncached(query)
+
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Embed several queries; cache misses share one batched forward pass."""
+        if query_cache is not None:
+            return query_cache.get_or_embed_many(queries, self._embed_queries_uncached)
+        return self._embed_queries_uncached(queries)
+
+    def search_many(self, queries: List[str], limit: int = 5, collapse_chunks: bool = False,
+                    filters: Optional[List[Optional[Dict]]] = None) -> List[List[Dict]]:
+        """Search for several queries at once: one embedding pass, one store request.
+
+        Returns one hit list per query, in query order. ``filters`` holds an
+        optional {"type": ..., "category": ...} filter per query.
+        """
+        if not queries:
+            return []
+        return self.search_many_vectors(self.embed_queries(queries), limit=limit, collapse_chunks=collapse_chunks,
+                                        filters=filters)
+
+    def search_many_vectors(self, vectors: List[List[float]], limit: int = 5, collapse_chunks: bool = False,
+                            include_vectors: bool = False, filters: Optional[List[Optional[Dict]]] = None,
+                            limits: Optional[List[int]] = None) -> List[List[Dict]]:
+        """search_many for query vectors that are already embedded, with optional per-query limits."""
+        if not len(vectors):
+            return []
+
+        limits = list(limits) if limits is not None else [limit] * len(vectors)
+        fetch = [n * Config.CHUNK_SEARCH_OVERFETCH for n in limits] if collapse_chunks else limits
+        with stage("vector_search"):
+            results = self.search_many_by_vector(vectors, limit=max(fetch), include_vectors=include_vectors,
+                                                 filters=filters, limits=fetch)
+        if collapse_chunks:
+            results = [collapse_to_parents(hits)[:n] for hits, n in zip(results, limits)]
+
+        log_event("rag.search_many", queries=len(vectors), results=sum(len(hits) for hits in results))
+        return results
+
+    def search(self, query: str, limit: int = 5, collapse_chunks: bool = False,
+               where: Optional[Dict] = None) -> List[Dict]:
+        """Search for relevant documents using BioBERT embedding (with sampled debug logs).
+
+        With collapse_chunks, hits are reduced to the best chunk per parent
+        document (over-fetching so up to ``limit`` documents come back).
+        ``where`` restricts the search to a type and/or category.
+        """
+        # Generate embedding for query
+        query_embedding = self.embed_query(query)
+
+        # Perform semantic search
+        fetch = limit * Config.CHUNK_SEARCH_OVERFETCH if collapse_chunks else limit
+        with stage("vector_search"):
+            if where:
+                hits = self.search_many_by_vector([query_embedding], limit=fetch, filters=[where])[0]
+            else:
+                hits = self.search_by_vector(query_embedding, limit=fetch)
+        if collapse_chunks:
+            hits = collapse_to_parents(hits)[:limit]
+
+        log_event(
+            "rag.search",
+            query=query,
+            embedding_dim=len(query_embedding),
+            results=len(hits),
+            top_snippet=hits[0].get("content", "")[:200] if hits else None,
+            top_distance=hits[0].get("_additional", {}).get("distance") if hits else None
+        )
+        return hits
+
+def _build_vector_store() -> VectorStore:
+    """Pick the store configured by VECTOR_STORE"""
+    if Config.VECTOR_STORE == "local":
+        from backend.services.local_store import LocalVectorStore
+        return LocalVectorStore(Config.LOCAL_STORE_DIR, index=Config.LOCAL_STORE_INDEX)
+    if Config.VECTOR_STORE == "weaviate":
+        from backend.services.weaviate_store import weaviate_store
+        return weaviate_store.resolve()
+    raise ValueError(f"Unknown VECTOR_STORE '{Config.VECTOR_STORE}', expected 'weaviate' or 'local'")
+
+# Singleton instance (built on first use or during app warmup)
+vector_store = registry.register("vector_store", _build_vector_store)
@@ -1,9 +1,40 @@
+import logging
 import weaviate
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 from backend.config import Config
-from backend.services.biobert_embedder import biobert_embedder
+from backend.services.filters import normalize_filter
+from backend.services.registry import registry
+from backend.services.telemetry import log_event
+from backend.services.vector_store import RESULT_PROPERTIES, VectorStore
 
-class WeaviateStore:
+# Added after the original schema; created on existing classes as needed
+CHUNK_PROPERTIES = [
+    {
+        "name": "parent_id",
+        "dataType": ["string"],
+        "description": "Identifier of the source document this chunk belongs to"
+    },
+    {
+        "name": "chunk_index",
+        "dataType": ["int"],
+        "description": "Position of the chunk within its source document"
+    },
+    {
+        "name": "chunk_count",
+        "dataType": ["int"],
+        "description": "Number of chunks the source document was split into"
+    }
+]
+
+def where_clause(key: Tuple) -> Dict:
+    """GraphQL where filter for a normalized type/category filter"""
+    operands = []
+    for prop, values in key:
+        clauses = [{"path": [prop], "operator": "Equal", "valueText": value} for value in values]
+        operands.append(clauses[0] if len(clauses) == 1 else {"operator": "Or", "operands": clauses})
+    return operands[0] if len(operands) == 1 else {"operator": "And", "operands": operands}
+
+class WeaviateStore(VectorStore):
     def __init__(self):
         # Initialize Weaviate client (v3 syntax)
         self.client = weaviate.Client(
@@ -17,8 +48,14 @@ class WeaviateStore:
 
     def _create_schema(self):
         """Create Weaviate schema if it doesn't exist."""
-        existing_classes = [cls["class"] for cls in self.client.schema.get()["classes"]]
-        if Config.WEAVIATE_CLASS_NAME not in existing_classes:
+        existing_classes = {cls["class"]: cls for cls in self.client.schema.get()["classes"]}
+        if Config.WEAVIATE_CLASS_NAME in existing_classes:
+            # Older deployments predate chunking, add the missing properties in place
+            existing_properties = {prop["name"] for prop in existing_classes[Config.WEAVIATE_CLASS_NAME].get("properties", [])}
+            for prop in CHUNK_PROPERTIES:
+                if prop["name"] not in existing_properties:
+                    self.client.schema.property.create(Config.WEAVIATE_CLASS_NAME, prop)
+        else:
             schema = {
                 "class": Config.WEAVIATE_CLASS_NAME,
                 "description": "Physiotherapy knowledge base including assessments and exercises",
@@ -39,77 +76,95 @@ class WeaviateStore:
                         "dataType": ["string"],
                         "description": "Category or condition name"
                     }
-                ]
+                ] + CHUNK_PROPERTIES
             }
             self.client.schema.create_class(schema)
 
-    def add_document(self, content: str, doc_type: str, category: str):
-        """Add a single document with BioBERT embedding."""
-        embedding = biobert_embedder.get_embedding(content)
-
-        data_object = {
-            "content": content,
-            "type": doc_type,
-            "category": category
-        }
-
-        self.client.data_object.create(
-            data_object=data_object,
-            class_name=Config.WEAVIATE_CLASS_NAME,
-            vector=embedding
-        )
-
-    def add_batch_documents(self, documents: List[Dict]):
-        """Add multiple documents in batch."""
+    def _write_objects(self, objects: List[Dict], embeddings: List[List[float]]):
+        """Insert objects with their vectors through the batch API."""
         with self.client.batch as batch:
             batch.batch_size = 20  # optional: adjust batch size
-            for doc in documents:
-                embedding = biobert_embedder.get_embedding(doc['content'])
-                data_object = {
-                    "content": doc['content'],
-                    "type": doc['type'],
-                    "category": doc.get('category', '')
-                }
+            for data_object, embedding in zip(objects, embeddings):
                 batch.add_data_object(
                     data_object=data_object,
                     class_name=Config.WEAVIATE_CLASS_NAME,
                     vector=embedding
                 )
 
-    def search(self, query: str, limit: int = 5) -> List[Dict]:
-        """Search for relevant documents using BioBERT embedding (with debug logs)."""
-        # Generate embedding for query
-        query_embedding = biobert_embedder.get_embedding(query)
-
-        # 🧪 Debug logs
-        print("\n" + "=" * 60)
-        print(f"[RAG DEBUG] Query: {query}")
-        print(f"[RAG DEBUG] Query embedding shape: {len(query_embedding)}")
-
-        # Perform semantic search
+    def search_by_vector(self, vector: List[float], limit: int = 5) -> List[Dict]:
+        """Nearest-neighbour search for an already embedded query."""
         result = (
-            self.client.query.get(Config.WEAVIATE_CLASS_NAME, ["content", "type", "category"])
-            .with_near_vector({"vector": query_embedding})
+            self.client.query.get(Config.WEAVIATE_CLASS_NAME, RESULT_PROPERTIES)
+            .with_near_vector({"vector": vector})
             .with_limit(limit)
             .with_additional(["distance"])   # Optional: include similarity score
             .do()
         )
 
-        # Extract and debug results
         if result and "data" in result and "Get" in result["data"]:
-            hits = result["data"]["Get"].get(Config.WEAVIATE_CLASS_NAME, [])
-            print(f"[RAG DEBUG] Retrieved results: {len(hits)}")
-            if hits:
-                print("[RAG DEBUG] Top result snippet:")
-                print(hits[0].get("content", "")[:200] + "...")
-                print(f"[RAG DEBUG] Distance: {hits[0].get('_additional', {}).get('distance', 'N/A')}")
-            print("=" * 60 + "\n")
-            return hits
+            return result["data"]["Get"].get(Config.WEAVIATE_CLASS_NAME, [])
 
         # Fallback if no results
-        print("[RAG DEBUG] No results found or unexpected response structure.")
-        print("=" * 60 + "\n")
+        log_event("weaviate.unexpected_response", level=logging.WARNING, response=result)
         return []
 
-# Singleton instance
-weaviate_store = WeaviateStore()
+    def search_many_by_vector(self, vectors: List[List[float]], limit: int = 5, include_vectors: bool = False,
+                              filters: Optional[List[Optional[Dict]]] = None,
+                              limits: Optional[List[int]] = None) -> List[List[Dict]]:
+        """All searches in one GraphQL request, one aliased Get clause per vector.
+
+        Filters are pushed down as where clauses, so each clause only
+        ranks objects of the requested type/category.
+        """
+        if not vectors:
+            return []
+
+        additional = ["id", "distance", "vector"] if include_vectors else ["id", "distance"]
+        builders = []
+        for i, vector in enumerate(vectors):
+            builder = (
+                self.client.query.get(Config.WEAVIATE_CLASS_NAME, RESULT_PROPERTIES)
+                .with_near_vector({"vector": vector})
+                .with_limit(limits[i] if limits is not None else limit)
+                .with_additional(additional)
+                .with_alias(f"q{i}")
+            )
+            key = normalize_filter(filters[i]) if filters is not None else None
+            if key is not None:
+                builder = builder.with_where(where_clause(key))
+            builders.append(builder)
+        result = self.client.query.multi_get(builders).do()
+
+        if result and "data" in result and "Get" in result["data"]:
+            found = result["data"]["Get"]
+            return [found.get(f"q{i}") or [] for i in range(len(vectors))]
+
+        log_event("weaviate.unexpected_response", level=logging.WARNING, response=result)
+        return [[] for _ in vectors]
+
+    def fetch_vectors(self, hits: List[Dict]) -> List[Optional[List[float]]]:
+        """Stored vectors of hits, by object ID, in one request for all of them"""
+        ids = [hit.get('_additional', {}).get('id') for hit in hits]
+        wanted = sorted({object_id for object_id in ids if object_id})
+        if not wanted:
+            return [None] * len(hits)
+
+        operands = [{"path": ["id"], "operator": "Equal", "valueText": object_id} for object_id in wanted]
+        where = operands[0] if len(operands) == 1 else {"operator": "Or", "operands": operands}
+        result = (
+            self.client.query.get(Config.WEAVIATE_CLASS_NAME, ["parent_id"])
+            .with_where(where)
+            .with_limit(len(wanted))
+            .with_additional(["id", "vector"])
+            .do()
+        )
+        if not (result and "data" in result and "Get" in result["data"]):
+            log_event("weaviate.unexpected_response", level=logging.WARNING, response=result)
+            return [None] * len(hits)
+
+        found = {obj["_additional"]["id"]: obj["_additional"]["vector"]
+                 for obj in result["data"]["Get"].get(Config.WEAVIATE_CLASS_NAME) or []}
+        return [found.get(object_id) for object_id in ids]
+
+# Singleton instance (built on first use or during app warmup)
+weaviate_store = registry.register("weaviate_store", WeaviateStore)
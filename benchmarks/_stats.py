@@ -0,0 +1,47 @@
+"""Latency percentiles and peak memory for the benchmarks, without third-party imports.
+
+Kept apart from embedding_benchmark so HTTP-only clients (load_test)
+don't import torch and BioBERT just to summarise their timings.
+"""
+
+import math
+import sys
+from typing import Dict, List
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+def _percentile(ordered: List[float], q: float) -> float:
+    """q-th percentile of sorted values with linear interpolation (numpy's default)"""
+    position = (len(ordered) - 1) * q / 100
+    lower = math.floor(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """p50/p95/p99/mean in milliseconds of latencies given in seconds"""
+    values = sorted(sample * 1000 for sample in samples)
+    if not values:
+        return {"p50_ms": math.nan, "p95_ms": math.nan, "p99_ms": math.nan, "mean_ms": math.nan}
+    return {
+        "p50_ms": _percentile(values, 50),
+        "p95_ms": _percentile(values, 95),
+        "p99_ms": _percentile(values, 99),
+        "mean_ms": sum(values) / len(values)
+    }
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far (NaN where it can't be measured)"""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KiB, macOS reports bytes
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    try:
+        import psutil
+    except ImportError:
+        return math.nan
+    memory = psutil.Process().memory_info()
+    # Windows tracks the peak working set; elsewhere fall back to the current RSS
+    return getattr(memory, "peak_wset", memory.rss) / (1024 * 1024)
@@ -0,0 +1,78 @@
+"""
+Threshold check for semantic matching in the /chat/ask answer cache.
+
+Embeds the labelled question pairs in benchmarks/question_pairs.json
+(paraphrases, and near misses that need a different answer) the way the
+answer cache does, and reports the cosine similarity of each pair. A
+threshold is only safe if no near miss reaches it; the report gives the
+lowest such threshold and how many paraphrases it still catches. Add pairs
+from real /ask traffic before relying on the result.
+
+    python -m benchmarks.answer_cache_calibration --output calibration.json
+    ANSWER_CACHE_SEMANTIC_ENABLED=true ANSWER_CACHE_THRESHOLD=<safe threshold> ...
+"""
+
+import os
+
+# Must be set before transformers is imported
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+
+import argparse
+import json
+from typing import Dict, List
+
+import numpy as np
+
+from backend.services.biobert_embedder import biobert_embedder
+
+DEFAULT_PAIRS = os.path.join(os.path.dirname(__file__), "question_pairs.json")
+
+def cosine(a: List[float], b: List[float]) -> float:
+    a, b = np.asarray(a, dtype=np.float32), np.asarray(b, dtype=np.float32)
+    return float(a @ b / max(float(np.linalg.norm(a) * np.linalg.norm(b)), 1e-12))
+
+def calibrate(pairs: List[Dict]) -> Dict:
+    questions = sorted({question for pair in pairs for question in (pair["a"], pair["b"])})
+    # Same vectors as VectorStore.embed_queries, without connecting to the store
+    vectors = dict(zip(questions, biobert_embedder.get_batch_embeddings(questions, use_cache=False)))
+    scored = [dict(pair, similarity=cosine(vectors[pair["a"]], vectors[pair["b"]])) for pair in pairs]
+
+    same = [pair["similarity"] for pair in scored if pair["same"]]
+    different = [pair["similarity"] for pair in scored if not pair["same"]]
+    # Smallest threshold above every near miss (float32 step so ties don't pass)
+    safe = float(np.nextafter(np.float32(max(different)), np.float32(2))) if different else None
+    return {
+        "pairs": scored,
+        "paraphrase_min": min(same) if same else None,
+        "near_miss_max": max(different) if different else None,
+        "safe_threshold": safe,
+        "paraphrase_recall": sum(score >= safe for score in same) / len(same) if same and safe is not None else None
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Check a similarity threshold for the /ask answer cache")
+    parser.add_argument("--pairs", default=DEFAULT_PAIRS, help="JSON list of {a, b, same} question pairs")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    with open(args.pairs, "r", encoding="utf-8") as f:
+        pairs = json.load(f)
+    result = calibrate(pairs)
+
+    for pair in sorted(result["pairs"], key=lambda pair: -pair["similarity"]):
+        print(f"  {pair['similarity']:.4f}  {'same     ' if pair['same'] else 'different'}  {pair['a']} | {pair['b']}")
+    print(f"Paraphrases >= {result['paraphrase_min']:.4f}, near misses up to {result['near_miss_max']:.4f}")
+    if result["safe_threshold"] is None or result["safe_threshold"] > 1.0:
+        print("No threshold separates them: keep ANSWER_CACHE_SEMANTIC_ENABLED=false")
+    else:
+        print(f"Lowest safe ANSWER_CACHE_THRESHOLD={result['safe_threshold']:.4f}, "
+              f"catching {result['paraphrase_recall']:.0%} of paraphrases")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Vector compression report: index size savings vs. recall loss on our corpus.
+
+Embeds the bundled documents once (raw fp32), then for each
+post-processing variant measures bytes per vector, JSON payload size and
+recall@k of the nearest-neighbour lists against exact cosine search on
+the raw fp32 vectors (what Weaviate does today).
+
+Storage is reported per vector store: the local store keeps vectors in
+EMBEDDING_DTYPE, but Weaviate stores every vector as float32, so float16
+only saves space with VECTOR_STORE=local (PCA saves space in both).
+
+    python -m benchmarks.compression_report --limit 800 --pca-dims 256,128
+"""
+
+import argparse
+import json
+from typing import Dict, List
+
+import numpy as np
+
+from backend.services.biobert_embedder import BioBERTEmbedder
+from backend.services.vector_postprocess import VectorPostProcessor, fit_pca
+from benchmarks.corpus import load_corpus_texts
+
+def top_k_neighbours(vectors: np.ndarray, query_rows: np.ndarray, k: int) -> np.ndarray:
+    """Exact cosine top-k for the query rows, excluding each query itself"""
+    vectors = vectors.astype(np.float32)
+    unit = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    scores = unit[query_rows] @ unit.T
+    scores[np.arange(len(query_rows)), query_rows] = -np.inf
+    top = np.argpartition(-scores, k, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+    return np.take_along_axis(top, order, axis=1)
+
+def recall_at_k(reference: np.ndarray, candidate: np.ndarray) -> float:
+    k = reference.shape[1]
+    overlaps = [len(set(ref) & set(cand)) / k for ref, cand in zip(reference, candidate)]
+    return float(np.mean(overlaps))
+
+def evaluate_variant(name: str, processor: VectorPostProcessor, raw: np.ndarray,
+                     query_rows: np.ndarray, reference: np.ndarray, k: int) -> Dict:
+    processed = processor.apply(raw)
+    neighbours = top_k_neighbours(processed, query_rows, k)
+    sample_json = [len(json.dumps(vector.tolist())) for vector in processed[:50]]
+    return {
+        "variant": name,
+        "dim": int(processed.shape[1]),
+        "dtype": processed.dtype.name,
+        # VECTOR_STORE=local stores the post-processed dtype, Weaviate always float32
+        "local_bytes_per_vector": int(processed.shape[1] * processed.dtype.itemsize),
+        "weaviate_bytes_per_vector": int(processed.shape[1] * np.dtype(np.float32).itemsize),
+        "local_index_mb": processed.nbytes / 1e6,
+        "json_bytes_per_vector": float(np.mean(sample_json)),
+        f"recall@{k}": recall_at_k(reference, neighbours)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Index size vs. recall for vector post-processing options")
+    parser.add_argument("--limit", type=int, default=None, help="Documents to embed (default: whole corpus)")
+    parser.add_argument("--queries", type=int, default=200, help="Documents used as queries")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--pca-dims", default="256,128", help="Comma separated PCA sizes to evaluate")
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    args = parser.parse_args()
+
+    texts = load_corpus_texts(limit=args.limit)
+    raw = np.array(BioBERTEmbedder().get_batch_embeddings(texts, postprocess=False), dtype=np.float32)
+    query_rows = np.random.default_rng(7).choice(len(raw), size=min(args.queries, len(raw)), replace=False)
+    reference = top_k_neighbours(raw, query_rows, args.k)
+
+    variants: List = [
+        ("fp32 (current)", VectorPostProcessor()),
+        ("fp32 + l2", VectorPostProcessor(normalize=True)),
+        ("fp16 + l2", VectorPostProcessor(normalize=True, dtype="float16")),
+    ]
+    for dim in (int(d) for d in args.pca_dims.split(",") if d):
+        # Fitted on the same corpus it is evaluated on, as it would be in production
+        projection = fit_pca(raw, dim)
+        variants.append((f"pca{dim} + l2", VectorPostProcessor(normalize=True, pca=projection)))
+        variants.append((f"pca{dim} + l2 + fp16", VectorPostProcessor(normalize=True, dtype="float16", pca=projection)))
+
+    rows = [evaluate_variant(name, processor, raw, query_rows, reference, args.k) for name, processor in variants]
+    baseline_bytes = rows[0]["weaviate_bytes_per_vector"]
+
+    print(f"\n{len(raw)} documents, {len(query_rows)} queries, exact fp32 cosine top-{args.k} as reference")
+    print("Storage per vector store: local keeps the variant's dtype, Weaviate always stores float32\n")
+    print(f"{'variant':<22}{'dim':>6}{'local B/vec':>13}{'saving':>8}{'weaviate B/vec':>16}{'saving':>8}"
+          f"{'json B/vec':>12}{'recall@' + str(args.k):>11}")
+    for row in rows:
+        row["local_saving"] = 1 - row["local_bytes_per_vector"] / baseline_bytes
+        row["weaviate_saving"] = 1 - row["weaviate_bytes_per_vector"] / baseline_bytes
+        print(f"{row['variant']:<22}{row['dim']:>6}{row['local_bytes_per_vector']:>13}{row['local_saving']:>8.0%}"
+              f"{row['weaviate_bytes_per_vector']:>16}{row['weaviate_saving']:>8.0%}"
+              f"{row['json_bytes_per_vector']:>12.0f}{row[f'recall@{args.k}']:>11.3f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"documents": len(raw), "queries": len(query_rows), "k": args.k, "variants": rows}, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+if __name__ == "__main__":
+    main()
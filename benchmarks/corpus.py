@@ -0,0 +1,39 @@
+import json
+import os
+import random
+from typing import Dict, List, Optional
+
+from backend.config import Config
+
+# The cleaned corpus files that ingest_data.py loads
+CORPUS_FILES = [
+    os.path.join(Config.ASSESSMENTS_PATH, "assessment_info_converted_v2.json"),
+    os.path.join(Config.EXERCISES_PATH, "exercise_info_converted_v2.json"),
+]
+
+def load_corpus_documents(limit: Optional[int] = None) -> List[Dict]:
+    """Load the bundled assessment and exercise documents.
+
+    With a limit, the same number of documents is taken from each file so
+    both types stay represented.
+    """
+    per_file = None if limit is None else max(1, limit // len(CORPUS_FILES))
+    documents = []
+    for path in CORPUS_FILES:
+        with open(path, "r", encoding="utf-8") as f:
+            items = json.load(f)
+        for item in items[:per_file]:
+            documents.append({
+                "content": item["content"],
+                "type": item.get("type", "assessment"),
+                "category": item.get("category", "")
+            })
+    return documents
+
+def load_corpus_texts(limit: Optional[int] = None) -> List[str]:
+    return [doc["content"] for doc in load_corpus_documents(limit)]
+
+def sample_corpus_texts(count: int, seed: int = 13) -> List[str]:
+    """Deterministic random sample of corpus texts"""
+    texts = load_corpus_texts()
+    return random.Random(seed).sample(texts, min(count, len(texts)))
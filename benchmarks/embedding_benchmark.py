@@ -0,0 +1,165 @@
+"""
+Embedding latency and throughput benchmark for BioBERTEmbedder.
+
+Runs fully offline against the locally cached model (HF_HUB_OFFLINE is
+forced on) and bypasses the embedding cache so every call hits the model.
+
+    python -m benchmarks.embedding_benchmark --output bench.json
+    python -m benchmarks.embedding_benchmark --compare bench.json
+"""
+
+import os
+
+# Must be set before transformers is imported
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+
+import argparse
+import json
+import platform
+import sys
+import time
+from typing import Dict, List
+
+import torch
+
+from backend.config import Config
+from backend.services.biobert_embedder import BioBERTEmbedder
+from benchmarks._stats import peak_rss_mb, percentiles
+from benchmarks.corpus import sample_corpus_texts
+
+def query_like(text: str, words: int = 12) -> str:
+    """Short, question-sized snippet of a corpus document"""
+    return " ".join(text.split()[:words])
+
+def bench_single_query(embedder: BioBERTEmbedder, texts: List[str], runs: int) -> Dict:
+    queries = [query_like(text) for text in texts]
+    for query in queries[:5]:
+        embedder.get_embedding(query)
+
+    latencies = []
+    for i in range(runs):
+        start = time.perf_counter()
+        embedder.get_embedding(queries[i % len(queries)])
+        latencies.append(time.perf_counter() - start)
+    return {"runs": runs, **percentiles(latencies)}
+
+def bench_throughput(embedder: BioBERTEmbedder, texts: List[str], batch_sizes: List[int],
+                     seq_lengths: List[int], docs: int) -> List[Dict]:
+    results = []
+    original_max_length = embedder.max_length
+    try:
+        for seq_len in seq_lengths:
+            # Corpus documents run to several hundred tokens, so truncation
+            # gives (close to) exactly seq_len tokens per text
+            embedder.max_length = seq_len
+            for batch_size in batch_sizes:
+                sample = texts[:docs]
+                embedder.get_batch_embeddings(sample[:batch_size], batch_size=batch_size)  # warmup
+
+                start = time.perf_counter()
+                embedder.get_batch_embeddings(sample, batch_size=batch_size)
+                elapsed = time.perf_counter() - start
+                results.append({
+                    "seq_len": seq_len,
+                    "batch_size": batch_size,
+                    "documents": len(sample),
+                    "seconds": elapsed,
+                    "docs_per_second": len(sample) / elapsed
+                })
+                print(f"  seq_len={seq_len:<4} batch_size={batch_size:<4} {len(sample) / elapsed:8.1f} docs/s")
+    finally:
+        embedder.max_length = original_max_length
+    return results
+
+def compare(current: Dict, baseline: Dict, max_regression: float) -> bool:
+    """Print deltas against a previous run; False if anything regressed beyond the threshold"""
+    ok = True
+    print(f"\nComparison against baseline (regression threshold {max_regression:.0%}):")
+
+    for key in ("p50_ms", "p95_ms", "p99_ms"):
+        before, after = baseline["single_query"][key], current["single_query"][key]
+        change = (after - before) / before if before else 0.0
+        flag = "REGRESSION" if change > max_regression else ""
+        ok &= not flag
+        print(f"  single query {key:<8} {before:9.2f} -> {after:9.2f} ({change:+.1%}) {flag}")
+
+    previous = {(row["seq_len"], row["batch_size"]): row for row in baseline["throughput"]}
+    for row in current["throughput"]:
+        before = previous.get((row["seq_len"], row["batch_size"]))
+        if before is None:
+            continue
+        change = (row["docs_per_second"] - before["docs_per_second"]) / before["docs_per_second"]
+        flag = "REGRESSION" if change < -max_regression else ""
+        ok &= not flag
+        print(f"  seq_len={row['seq_len']:<4} batch_size={row['batch_size']:<4} "
+              f"{before['docs_per_second']:8.1f} -> {row['docs_per_second']:8.1f} docs/s ({change:+.1%}) {flag}")
+
+    print(f"  peak RSS {baseline['peak_rss_mb']:.0f} MB -> {current['peak_rss_mb']:.0f} MB")
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description="BioBERT embedding latency/throughput benchmark")
+    parser.add_argument("--backend", default=Config.EMBEDDING_BACKEND, choices=["torch", "onnx"])
+    parser.add_argument("--queries", type=int, default=200, help="Single-query latency runs")
+    parser.add_argument("--docs", type=int, default=128, help="Documents per throughput measurement")
+    parser.add_argument("--batch-sizes", default="1,8,16,32,64")
+    parser.add_argument("--seq-lengths", default="64,128,256,512")
+    parser.add_argument("--threads", type=int, default=0, help="torch intra-op threads (0 = default)")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Baseline JSON from a previous run")
+    parser.add_argument("--max-regression", type=float, default=0.10)
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    start = time.perf_counter()
+    embedder = BioBERTEmbedder(backend=args.backend, use_cache=False, verbose=False)
+    load_seconds = time.perf_counter() - start
+    rss_after_load = peak_rss_mb()
+
+    texts = sample_corpus_texts(max(args.docs, 64))
+
+    print(f"Model loaded in {load_seconds:.1f}s ({args.backend}), peak RSS {rss_after_load:.0f} MB")
+    print("Single query latency...")
+    single = bench_single_query(embedder, texts, args.queries)
+    print(f"  p50={single['p50_ms']:.1f}ms p95={single['p95_ms']:.1f}ms p99={single['p99_ms']:.1f}ms")
+    print("Batch throughput...")
+    throughput = bench_throughput(
+        embedder, texts,
+        batch_sizes=[int(b) for b in args.batch_sizes.split(",")],
+        seq_lengths=[int(s) for s in args.seq_lengths.split(",")],
+        docs=args.docs
+    )
+
+    results = {
+        "environment": {
+            "model": Config.BIOBERT_MODEL,
+            "backend": args.backend,
+            "torch": torch.__version__,
+            "torch_threads": torch.get_num_threads(),
+            "cpu_count": os.cpu_count(),
+            "platform": platform.platform(),
+            "python": platform.python_version()
+        },
+        "load_seconds": load_seconds,
+        "rss_after_load_mb": rss_after_load,
+        "single_query": single,
+        "throughput": throughput,
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if not compare(results, baseline, args.max_regression):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
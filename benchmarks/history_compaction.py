@@ -0,0 +1,136 @@
+"""
+Prompt-size report for conversation compaction.
+
+Replays synthetic intake conversations of increasing length and counts
+the tokens of every intake prompt with the full transcript and with
+HistoryCompactor, for both intake modes:
+
+- slots: older messages are dropped, the intake state carries the facts
+- transcript: older messages are folded into a running summary, refreshed
+  every HISTORY_SUMMARY_BATCH messages by the (stub) LLM; the refresh
+  prompts are counted as part of the compacted cost
+
+Tokens are counted with the local BioBERT tokenizer, which tracks Gemini's
+count closely enough for relative savings. Runs offline with the LLM stub.
+
+    python -m benchmarks.history_compaction --turns 12,24,48 --recent 6 --batch 6
+"""
+
+import os
+
+# Must be set before transformers is imported
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+
+import argparse
+import json
+from datetime import datetime
+from typing import Dict, List
+
+from backend.models.chat import ChatMessage
+from backend.prompts.info_gathering_prompt import get_info_gathering_prompt
+from backend.prompts.intake_prompt import INTAKE_FIELDS, get_intake_prompt
+from backend.services.history import HistoryCompactor, format_messages
+from backend.services.intake import empty_state
+from backend.services.reranker import context_assembler
+from backend.services.stub_llm import INTAKE_QUESTIONS, StubLLM
+from benchmarks.load_test import ANSWERS
+
+# What patients add once the intake questions are answered (clarifications, side questions)
+FOLLOW_UPS = [
+    "Also, the pain sometimes spreads down to my thigh when I bend forward",
+    "Is it okay if I keep going to the gym in the meantime?",
+    "I forgot to mention that I sit at a desk for about nine hours a day",
+    "Mornings are the worst, it eases a bit after I move around",
+    "My father had a slipped disc, could this be the same thing?",
+    "I tried a hot water bag yesterday and it helped a little"
+]
+FOLLOW_UP_REPLY = "Thank you for sharing that, it helps me understand your condition better. Is there anything else you would like to add?"
+
+def conversation(user_turns: int) -> List[ChatMessage]:
+    """Greeting, then one question/answer pair per user turn"""
+    now = datetime.now()
+    messages = [ChatMessage(role="assistant", content="Hello! I am Hassy, your AI Physio Assistant. How can I assist you today?", timestamp=now)]
+    for turn in range(user_turns):
+        if turn < len(ANSWERS):
+            messages.append(ChatMessage(role="user", content=ANSWERS[turn], timestamp=now))
+            messages.append(ChatMessage(role="assistant", content=INTAKE_QUESTIONS[(turn + 1) % len(INTAKE_QUESTIONS)], timestamp=now))
+        else:
+            messages.append(ChatMessage(role="user", content=FOLLOW_UPS[turn % len(FOLLOW_UPS)], timestamp=now))
+            messages.append(ChatMessage(role="assistant", content=FOLLOW_UP_REPLY, timestamp=now))
+    return messages
+
+def count(text: str) -> int:
+    return context_assembler.count_tokens([text])[0]
+
+def replay(messages: List[ChatMessage], compactor: HistoryCompactor, llm: StubLLM) -> Dict:
+    """Prompt tokens per user turn, full vs compacted, for both intake modes"""
+    totals = {"slots_full": 0, "slots_compact": 0, "transcript_full": 0, "transcript_compact": 0, "summary_refresh": 0}
+    last = {}
+    state = empty_state()
+    summary = None
+
+    user_positions = [i for i, msg in enumerate(messages) if msg.role == "user"]
+    for turn, position in enumerate(user_positions):
+        history = messages[:position + 1]
+        if turn < len(INTAKE_FIELDS):
+            state[INTAKE_FIELDS[turn][0]] = ANSWERS[turn]
+
+        last = {
+            "slots_full": count(get_intake_prompt(format_messages(history), state)),
+            "slots_compact": count(get_intake_prompt(compactor.render(history, facts_tracked=True), state)),
+            "transcript_full": count(get_info_gathering_prompt(format_messages(history))),
+            "transcript_compact": count(get_info_gathering_prompt(compactor.render(history, summary)))
+        }
+        for key, tokens in last.items():
+            totals[key] += tokens
+
+        # As in the chat route: the summary is refreshed after the reply is added
+        history = messages[:position + 2]
+        compaction = compactor.compaction(history, summary)
+        if compaction is not None:
+            prompt, covered = compaction
+            summary = {"text": llm.respond(prompt), "messages": covered}
+            totals["summary_refresh"] += count(prompt)
+
+    return {"last_turn": last, "totals": totals}
+
+def savings(full: int, compact: int) -> float:
+    return 1 - compact / full if full else 0.0
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt tokens with and without conversation compaction")
+    parser.add_argument("--turns", default="12,24,48", help="Conversation lengths in user messages")
+    parser.add_argument("--recent", type=int, default=6, help="Messages kept verbatim (HISTORY_RECENT_MESSAGES)")
+    parser.add_argument("--batch", type=int, default=6, help="Summary refresh batch (HISTORY_SUMMARY_BATCH)")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    compactor = HistoryCompactor(recent_messages=args.recent, summary_batch=args.batch)
+    llm = StubLLM(latency_ms=0, tokens_per_second=0)
+
+    results = []
+    print(f"Prompt tokens (last turn / whole conversation), {args.recent} recent messages, batch {args.batch}:")
+    for user_turns in [int(turns) for turns in args.turns.split(",")]:
+        result = replay(conversation(user_turns), compactor, llm)
+        last, totals = result["last_turn"], result["totals"]
+        transcript_compact_total = totals["transcript_compact"] + totals["summary_refresh"]
+        result.update({
+            "user_turns": user_turns,
+            "slots_savings": savings(totals["slots_full"], totals["slots_compact"]),
+            "transcript_savings": savings(totals["transcript_full"], transcript_compact_total)
+        })
+        results.append(result)
+
+        print(f"  {user_turns:>3} turns  slots {last['slots_full']:>5} -> {last['slots_compact']:>5} "
+              f"({totals['slots_full']} -> {totals['slots_compact']}, {-result['slots_savings']:+.0%})  "
+              f"transcript {last['transcript_full']:>5} -> {last['transcript_compact']:>5} "
+              f"({totals['transcript_full']} -> {transcript_compact_total} incl. refreshes, {-result['transcript_savings']:+.0%})")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"recent_messages": args.recent, "summary_batch": args.batch, "results": results}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
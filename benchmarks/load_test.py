@@ -0,0 +1,175 @@
+"""
+Concurrent-session load test against a running API server.
+
+Each simulated patient registers, starts a chat and answers the intake
+questions until the summary arrives, so every turn goes through Mongo,
+per-message retrieval and the LLM. Sessions run at increasing concurrency
+levels; if the routes really run concurrently, turns/s scales with the
+number of sessions until the blocking executor or the LLM saturates.
+
+Run the server with the deterministic LLM stub so Gemini quota and
+latency stay out of the numbers:
+
+    LLM_BACKEND=stub python -m uvicorn backend.app:app --port 8002
+    python -m benchmarks.load_test --concurrency 1,4,16,64 --output load.json
+    python -m benchmarks.load_test --stream      # also reports time to first token
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from typing import Dict, List, Optional
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - optional dependency
+    httpx = None
+
+from benchmarks._stats import percentiles
+
+# One answer per intake field, in the order they are asked
+ANSWERS = [
+    "English",
+    "My name is Ravi",
+    "I am 42 years old",
+    "I weigh 78 kg",
+    "I have pain in my lower back",
+    "Lower back, on the right side",
+    "It started three weeks ago after lifting a heavy box",
+    "About three weeks now",
+    "Around 6 out of 10",
+    "Sitting for long makes it worse, walking helps",
+    "Only some painkillers",
+    "No redness"
+]
+
+async def read_stream(response) -> Dict:
+    """The done event of an SSE reply, plus the time its first token arrived"""
+    first_token = None
+    done = None
+    event = None
+    async for line in response.aiter_lines():
+        if line.startswith("event: "):
+            event = line[len("event: "):]
+            if event == "token" and first_token is None:
+                first_token = time.perf_counter()
+        elif line.startswith("data: ") and event in ("done", "error"):
+            done = {"event": event, **json.loads(line[len("data: "):])}
+    return {**(done or {}), "first_token": first_token}
+
+async def run_session(client, run_id: str, index: int, stream: bool, max_turns: int, stats: Dict):
+    """One patient from registration to summary"""
+    response = await client.post("/auth/register", json={"email": f"load-{run_id}-{index}@example.com"})
+    response.raise_for_status()
+    user_id = response.json()["user_id"]
+    (await client.post(f"/chat/start/{user_id}")).raise_for_status()
+
+    for turn in range(max_turns):
+        message = ANSWERS[turn % len(ANSWERS)]
+        start = time.perf_counter()
+        if stream:
+            async with client.stream("POST", "/chat/message/stream", json={"user_id": user_id, "message": message}) as response:
+                response.raise_for_status()
+                result = await read_stream(response)
+            if result.get("event") != "done":
+                raise RuntimeError(f"Stream failed: {result}")
+            if result["first_token"] is not None:
+                stats["first_token"].append(result["first_token"] - start)
+        else:
+            response = await client.post("/chat/message", json={"user_id": user_id, "message": message})
+            response.raise_for_status()
+            result = response.json()
+        stats["turn"].append(time.perf_counter() - start)
+
+        if result["is_summary"]:
+            stats["sessions"] += 1
+            return
+    stats["unfinished"] += 1
+
+async def run_level(url: str, concurrency: int, stream: bool, max_turns: int, timeout: float) -> Dict:
+    stats = {"turn": [], "first_token": [], "sessions": 0, "unfinished": 0, "errors": 0}
+    run_id = uuid.uuid4().hex[:8]
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits) as client:
+        async def guarded(index: int):
+            try:
+                await run_session(client, run_id, index, stream, max_turns, stats)
+            except Exception as e:
+                stats["errors"] += 1
+                print(f"  session {index} failed: {type(e).__name__}: {e}")
+
+        start = time.perf_counter()
+        await asyncio.gather(*(guarded(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    result = {
+        "concurrency": concurrency,
+        "seconds": elapsed,
+        "sessions": stats["sessions"],
+        "unfinished": stats["unfinished"],
+        "errors": stats["errors"],
+        "turns": len(stats["turn"]),
+        "turns_per_second": len(stats["turn"]) / elapsed,
+        "sessions_per_second": stats["sessions"] / elapsed
+    }
+    if stats["turn"]:
+        result["turn_latency"] = percentiles(stats["turn"])
+    if stats["first_token"]:
+        result["first_token_latency"] = percentiles(stats["first_token"])
+    return result
+
+async def run(url: str, levels: List[int], stream: bool, max_turns: int, timeout: float) -> List[Dict]:
+    results = []
+    for concurrency in levels:
+        result = await run_level(url, concurrency, stream, max_turns, timeout)
+        results.append(result)
+
+        line = (f"  {concurrency:>4} sessions: {result['turns_per_second']:7.1f} turns/s "
+                f"{result['sessions_per_second']:6.2f} sessions/s")
+        if "turn_latency" in result:
+            line += f"  turn p50={result['turn_latency']['p50_ms']:.0f}ms p95={result['turn_latency']['p95_ms']:.0f}ms"
+        if "first_token_latency" in result:
+            line += f"  first token p50={result['first_token_latency']['p50_ms']:.0f}ms"
+        if result["errors"] or result["unfinished"]:
+            line += f"  ({result['errors']} failed, {result['unfinished']} unfinished)"
+        print(line)
+    return results
+
+def scaling(results: List[Dict]) -> Optional[float]:
+    """Throughput at the highest level relative to one session"""
+    base = next((r for r in results if r["concurrency"] == 1), None)
+    if base is None or not base["turns_per_second"]:
+        return None
+    return results[-1]["turns_per_second"] / base["turns_per_second"]
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent chat sessions against a running server")
+    parser.add_argument("--url", default="http://localhost:8002")
+    parser.add_argument("--concurrency", default="1,4,16,64", help="Concurrent sessions per level")
+    parser.add_argument("--stream", action="store_true", help="Use /chat/message/stream")
+    parser.add_argument("--max-turns", type=int, default=30, help="Give up on a session after this many messages")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    if httpx is None:
+        raise SystemExit("The load test needs httpx: pip install httpx")
+
+    levels = [int(level) for level in args.concurrency.split(",")]
+    print(f"Load testing {args.url} ({'streaming' if args.stream else 'blocking'} replies)...")
+    results = asyncio.run(run(args.url, levels, args.stream, args.max_turns, args.timeout))
+
+    speedup = scaling(results)
+    if speedup is not None:
+        print(f"  throughput x{speedup:.1f} from 1 to {levels[-1]} sessions")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"url": args.url, "stream": args.stream, "levels": results, "scaling": speedup}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Offline end-to-end retrieval benchmark for RAGService.
+
+Builds a local vector store (and BM25 index) from the corpus in data/ in a
+temporary directory, runs the labelled queries in benchmarks/queries.json
+through RAGService and reports recall@k, MRR, per-stage latency
+percentiles and memory use. Nothing touches the network: the model comes
+from the local Hugging Face cache and the store is in-process.
+
+A query's relevant documents are the corpus records of its ``type`` whose
+header (first 400 characters, where the record's name is) contains one of
+its ``match`` strings. recall@k is the share of relevant documents in the
+top k, capped at k (so a query with 20 relevant records can still score 1).
+
+    python -m benchmarks.retrieval_benchmark --output retrieval.json
+    python -m benchmarks.retrieval_benchmark --mode hybrid --index hnsw
+"""
+
+import os
+
+# Must be set before transformers is imported
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+
+import argparse
+import copy
+import json
+import shutil
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List, Set
+
+from backend.config import Config
+from backend.services.chunker import document_id
+from benchmarks.corpus import load_corpus_documents
+from benchmarks._stats import peak_rss_mb, percentiles
+
+DEFAULT_QUERIES = os.path.join(os.path.dirname(__file__), "queries.json")
+HEADER_CHARS = 400
+
+def load_queries(path: str) -> List[Dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def relevant_parents(query: Dict, documents: List[Dict]) -> Set[str]:
+    """parent_ids of the documents a labelled query should retrieve"""
+    needles = [needle.lower() for needle in query["match"]]
+    return {
+        document_id(doc["content"])
+        for doc in documents
+        if doc["type"] == query["type"] and any(needle in doc["content"][:HEADER_CHARS].lower() for needle in needles)
+    }
+
+def score_ranking(ranked_parents: List[str], relevant: Set[str], ks: List[int]) -> Dict:
+    scores = {}
+    for k in ks:
+        found = len(relevant.intersection(ranked_parents[:k]))
+        scores[f"recall@{k}"] = found / min(k, len(relevant))
+    first = next((rank for rank, parent in enumerate(ranked_parents, start=1) if parent in relevant), None)
+    scores["mrr"] = 1.0 / first if first else 0.0
+    return scores
+
+def build_store(store_dir: str, index: str, documents: List[Dict]):
+    """Local store plus BM25 index in store_dir, filled through the normal ingest path"""
+    from backend.services.local_store import LocalVectorStore
+
+    store = LocalVectorStore(store_dir, index=index)
+    start = time.perf_counter()
+    store.add_batch_documents(documents, workers=0)
+    return store, time.perf_counter() - start
+
+def run_queries(rag, query_embedder, queries: List[Dict], documents: List[Dict], ks: List[int], repeats: int) -> Dict:
+    from backend.services.telemetry import stage_recorder_var
+
+    per_query = []
+    stage_samples: Dict[str, List[float]] = defaultdict(list)
+    totals = []
+    limit = max(ks)
+
+    for query in queries:
+        relevant = relevant_parents(query, documents)
+        if not relevant:
+            print(f"  skipping (no labelled documents in corpus): {query['query']}")
+            continue
+
+        for repeat in range(repeats):
+            recorder = []
+            token = stage_recorder_var.set(recorder)
+            start = time.perf_counter()
+            try:
+                # Same steps as RAGService.retrieve_context, keeping the ranked hits
+                vectors = query_embedder.get_batch_embeddings([query["query"]])
+                hits = rag.search([query["query"]], limit=limit, vectors=vectors)[0]
+                rag.format_context([hits], vectors)
+            finally:
+                stage_recorder_var.reset(token)
+            totals.append(time.perf_counter() - start)
+
+            per_stage = defaultdict(float)
+            for name, seconds in recorder:
+                per_stage[name] += seconds
+            for name, seconds in per_stage.items():
+                stage_samples[name].append(seconds)
+
+        ranked = [hit.get("parent_id") for hit in hits]
+        per_query.append({"query": query["query"], "type": query["type"], "relevant": len(relevant),
+                          **score_ranking(ranked, relevant, ks)})
+
+    metrics = {key: sum(row[key] for row in per_query) / len(per_query)
+               for key in [f"recall@{k}" for k in ks] + ["mrr"]} if per_query else {}
+    return {
+        "queries": len(per_query),
+        "metrics": metrics,
+        "latency": {"total": percentiles(totals), **{name: percentiles(samples) for name, samples in stage_samples.items()}},
+        "per_query": per_query
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline retrieval quality and latency benchmark")
+    parser.add_argument("--queries", default=DEFAULT_QUERIES, help="Labelled query set (JSON)")
+    parser.add_argument("--docs", type=int, default=None, help="Index only this many corpus documents")
+    parser.add_argument("--index", default="exact", choices=["exact", "hnsw"])
+    parser.add_argument("--mode", default=Config.RETRIEVAL_MODE, choices=["vector", "hybrid"])
+    parser.add_argument("--k", default="1,5,10", help="Cut-offs for recall@k")
+    parser.add_argument("--repeats", type=int, default=3, help="Latency runs per query")
+    parser.add_argument("--store-dir", help="Build the index here and keep it (default: a temporary directory)")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    ks = [int(k) for k in args.k.split(",")]
+    store_dir = args.store_dir or tempfile.mkdtemp(prefix="physio-retrieval-bench-")
+    os.makedirs(store_dir, exist_ok=True)
+    if os.listdir(store_dir):
+        parser.error(f"--store-dir {store_dir} must be empty")
+
+    # Point the BM25 index at the benchmark directory before anything loads it
+    Config.LEXICAL_INDEX_PATH = os.path.join(store_dir, "bm25.json.gz")
+    Config.RETRIEVAL_MODE = args.mode
+
+    from backend.services.biobert_embedder import biobert_embedder
+    from backend.services.rag_service import RAGService
+
+    try:
+        documents = load_corpus_documents(args.docs)
+        print(f"Indexing {len(documents)} documents ({args.index}, {args.mode} retrieval)...")
+        store, build_seconds = build_store(store_dir, args.index, documents)
+        rss_after_build = peak_rss_mb()
+        print(f"  {store.count} objects in {build_seconds:.1f}s, peak RSS {rss_after_build:.0f} MB")
+
+        # Documents keep using the embedding cache (as in production, e.g. for BM25-only hits);
+        # queries go through an uncached view of the same model so every run reaches it
+        query_embedder = copy.copy(biobert_embedder.resolve())
+        query_embedder.cache = None
+        query_embedder.verbose = False
+
+        rag = RAGService(store=store)
+        queries = load_queries(args.queries)
+        print(f"Running {len(queries)} queries x {args.repeats}...")
+        results = run_queries(rag, query_embedder, queries, documents, ks, args.repeats)
+    finally:
+        if not args.store_dir:
+            shutil.rmtree(store_dir, ignore_errors=True)
+
+    for key, value in results["metrics"].items():
+        print(f"  {key:<10} {value:.3f}")
+    for name, stats in results["latency"].items():
+        print(f"  {name:<18} p50={stats['p50_ms']:.1f}ms p95={stats['p95_ms']:.1f}ms p99={stats['p99_ms']:.1f}ms")
+    print(f"  peak RSS {peak_rss_mb():.0f} MB")
+
+    report = {
+        "config": {
+            "model": Config.BIOBERT_MODEL,
+            "backend": Config.EMBEDDING_BACKEND,
+            "index": args.index,
+            "mode": args.mode,
+            "documents": len(documents),
+            "objects": store.count,
+            "limit": max(ks),
+            "rerank": Config.RERANK_ENABLED,
+            "type_quotas": Config.RAG_TYPE_QUOTAS
+        },
+        "build_seconds": build_seconds,
+        "rss_after_build_mb": rss_after_build,
+        "peak_rss_mb": peak_rss_mb(),
+        **results
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
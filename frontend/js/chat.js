@@ -122,8 +122,10 @@ async function sendMessage() {
     addMessage('user', message);
     input.value = '';
     
+    let contentDiv = null;
+    
     try {
-        const response = await fetch(`${API_URL}/chat/message`, {
+        const response = await fetch(`${API_URL}/chat/message/stream`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
@@ -134,19 +136,69 @@ async function sendMessage() {
             })
         });
         
-        const data = await response.json();
-        
-        if (response.ok) {
-            addMessage('assistant', data.response, data.is_summary);
-        } else {
+        if (!response.ok) {
             addMessage('assistant', 'Sorry, there was an error processing your message.');
+            return;
         }
+        
+        // Render tokens as they arrive; "done" carries the saved response
+        let text = '';
+        await readEventStream(response, (event, data) => {
+            if (event === 'token') {
+                text += data.text;
+                if (!contentDiv) {
+                    contentDiv = addMessage('assistant', text);
+                } else {
+                    renderContent(contentDiv, text);
+                }
+                scrollToBottom();
+            } else if (event === 'reset') {
+                text = '';
+                if (contentDiv) renderContent(contentDiv, text);
+            } else if (event === 'done') {
+                if (!contentDiv) {
+                    contentDiv = addMessage('assistant', data.response, data.is_summary);
+                } else {
+                    renderContent(contentDiv, data.response, data.is_summary);
+                }
+            } else if (event === 'error') {
+                console.error('Stream error:', data.detail);
+                addMessage('assistant', 'Sorry, there was an error processing your message.');
+            }
+        });
     } catch (error) {
         console.error('Send message error:', error);
         addMessage('assistant', 'Connection error. Please try again.');
     }
 }
 
+async function readEventStream(response, onEvent) {
+    // Server-Sent Events over a POST response: frames are separated by a blank line
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const frame = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            
+            let event = 'message';
+            let data = '';
+            frame.split('\n').forEach(line => {
+                if (line.startsWith('event: ')) event = line.slice(7);
+                else if (line.startsWith('data: ')) data += line.slice(6);
+            });
+            onEvent(event, data ? JSON.parse(data) : {});
+        }
+    }
+}
+
 function addMessage(role, content, isSummary = false) {
     const chatContainer = document.getElementById('chatContainer');
     
@@ -154,14 +206,7 @@ function addMessage(role, content, isSummary = false) {
     messageDiv.className = `message ${role}`;
     
     const contentDiv = document.createElement('div');
-    contentDiv.className = `message-content ${isSummary ? 'summary' : ''}`;
-    
-    // Convert markdown-like formatting to HTML
-    let formattedContent = content
-        .replace(/\*\*(.*?)\*\*/g, '<strong>$1</strong>')
-        .replace(/\n/g, '<br>');
-    
-    contentDiv.innerHTML = formattedContent;
+    renderContent(contentDiv, content, isSummary);
     
     const timestamp = document.createElement('div');
     timestamp.className = 'timestamp';
@@ -172,6 +217,18 @@ function addMessage(role, content, isSummary = false) {
     chatContainer.appendChild(messageDiv);
     
     scrollToBottom();
+    return contentDiv;
+}
+
+function renderContent(contentDiv, content, isSummary = false) {
+    contentDiv.className = `message-content ${isSummary ? 'summary' : ''}`;
+    
+    // Convert markdown-like formatting to HTML
+    let formattedContent = content
+        .replace(/\*\*(.*?)\*\*/g, '<strong>$1</strong>')
+        .replace(/\n/g, '<br>');
+    
+    contentDiv.innerHTML = formattedContent;
 }
 
 function scrollToBottom() {
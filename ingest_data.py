@@ -1,33 +1,55 @@
+import argparse
 import json
-from backend.services.weaviate_store import weaviate_store
-
-# Load JSON data
-with open("data/assessments/assessment_info_converted_v2.json", "r", encoding="utf-8") as f:
-    raw_data = json.load(f)
-
-documents = []
-
-# Convert raw_data items into dicts
-for item in raw_data:
-    if isinstance(item, str):
-        # If it's a string, wrap it in a dict
-        documents.append({
-            "content": item,
-            "type": "exercise",
-            "category": "general"
-        })
-    elif isinstance(item, dict):
-        # If it's already a dict, just use it (ensure 'content' key exists)
-        if "content" in item:
-            documents.append(item)
+from backend.config import Config
+from backend.services.vector_store import vector_store
+from backend.services.kb_version import knowledge_base_version
+
+def load_documents(path):
+    """Load JSON data and convert raw items into document dicts"""
+    with open(path, "r", encoding="utf-8") as f:
+        raw_data = json.load(f)
+
+    documents = []
+
+    # Convert raw_data items into dicts
+    for item in raw_data:
+        if isinstance(item, str):
+            # If it's a string, wrap it in a dict
+            documents.append({
+                "content": item,
+                "type": "exercise",
+                "category": "general"
+            })
+        elif isinstance(item, dict):
+            # If it's already a dict, just use it (ensure 'content' key exists)
+            if "content" in item:
+                documents.append(item)
+            else:
+                print(f"⚠️ Skipping invalid item: {item}")
         else:
-            print(f"⚠️ Skipping invalid item: {item}")
-    else:
-        print(f"⚠️ Skipping unknown item type: {item}")
+            print(f"⚠️ Skipping unknown item type: {item}")
+
+    return documents
+
+def main():
+    parser = argparse.ArgumentParser(description="Embed physiotherapy documents and load them into the vector store")
+    parser.add_argument("--file", default="data/assessments/assessment_info_converted_v2.json",
+                        help="JSON file to ingest")
+    parser.add_argument("--workers", type=int, default=Config.EMBEDDING_WORKERS,
+                        help="Embedding worker processes (0 or 1 embeds in this process)")
+    args = parser.parse_args()
+
+    documents = load_documents(args.file)
+
+    print(f"📚 Loading {len(documents)} physiotherapy documents...")
 
-print(f"📚 Loading {len(documents)} physiotherapy documents...")
+    # Add documents to the configured vector store (Weaviate or local)
+    vector_store.add_batch_documents(documents, workers=args.workers)
+    # Running servers drop /chat/ask answers generated from the old knowledge base
+    knowledge_base_version.bump()
 
-# Add documents to Weaviate
-weaviate_store.add_batch_documents(documents)
+    print(f"✅ Done! All documents inserted successfully into the {Config.VECTOR_STORE} vector store.")
 
-print("✅ Done! All documents inserted successfully into Weaviate.")
+# The guard matters: embedding workers are spawned and re-import this module
+if __name__ == "__main__":
+    main()